@@ -0,0 +1,34 @@
+import os
+import threading
+from contextlib import contextmanager
+
+# ========= Atomic File Writes =========
+# Files a report may read at any moment (job files, photos, print copies) are
+# written under a temp name beside their destination and renamed over it, so
+# a reader sees the old file or the new one, never half of either.
+
+@contextmanager
+def replacing(path):
+    """Yield a temp path beside `path`. What the block puts there replaces
+    `path` when it ends, or is removed if it raises."""
+    # Unique per thread, so concurrent writers of one path never share a temp file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+def write_atomic(path, data, fsync=False):
+    """Write `data` to `path` atomically, creating its folder if needed.
+    With `fsync`, the bytes are on disk before they replace the old file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with replacing(path) as tmp_path, open(tmp_path, "wb") as f:
+        f.write(data)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,76 @@
+"""Time catalog loading on a synthetic price list: iterrows versus vectorized.
+
+Run from the repository root:
+
+    python backend/benchmarks/bench_catalog_load.py --rows 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pandas as pd
+
+from catalog import Catalog, read_catalog
+
+def make_csv(path, rows, bad_ratio):
+    rng = random.Random(0)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("Item,Description,Unit,Price\n")
+        for i in range(rows):
+            price = "TBD" if rng.random() < bad_ratio else f"{rng.uniform(0.5, 500):.2f}"
+            f.write(f"ITEM{i:07d},Synthetic line item {i} per sq ft - economy grade,SF,{price}\n")
+
+def load_iterrows(csv_path):
+    """The loader main.py used before the catalog was parsed column-wise"""
+    data = {}
+    df = pd.read_csv(csv_path, encoding="utf-8", on_bad_lines="skip")
+    for _, row in df.iterrows():
+        try:
+            code = str(row["Item"]).strip()
+            desc = str(row["Description"]).strip()
+            unit = str(row["Unit"]).strip()
+            price = float(row["Price"])
+            data[code] = {"desc": desc, "unit": unit, "price": price}
+        except Exception:
+            continue
+    return data
+
+def load_vectorized(csv_path):
+    items, _ = read_catalog(csv_path)
+    return Catalog.from_frame(items)
+
+def best_of(fn, path, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(result)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--bad-ratio", type=float, default=0.01, help="share of rows with an unparseable price")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "catalog.csv")
+        make_csv(csv_path, args.rows, args.bad_ratio)
+
+        old_time, old_items = best_of(load_iterrows, csv_path, args.repeat)
+        new_time, new_items = best_of(load_vectorized, csv_path, args.repeat)
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    print(f"{'':<12}{'load (s)':>10}{'items':>10}")
+    print(f"{'iterrows':<12}{old_time:>10.3f}{old_items:>10}")
+    print(f"{'vectorized':<12}{new_time:>10.3f}{new_items:>10}")
+    print(f"{old_time / new_time:.1f}x faster")
+
+if __name__ == "__main__":
+    main()
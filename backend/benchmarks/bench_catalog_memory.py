@@ -0,0 +1,73 @@
+"""Compare catalog memory: dict-of-dicts versus the packed Catalog.
+
+Run from the repository root:
+
+    python backend/benchmarks/bench_catalog_memory.py --sizes 10000 100000 1000000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from catalog import Catalog
+
+CATEGORIES = ["Drywall", "Roofing", "Flooring", "Painting", "Plumbing", "Electrical", "Cleaning", "Framing"]
+ACTIONS = ["installation", "removal", "repair", "replacement", "detach & reset"]
+UNITS = ["SF", "LF", "SY", "EA", "HR", "LB", "CY"]
+GRADES = ["", " - economy grade", " - standard grade", " - premium quality"]
+
+def make_columns(size):
+    rng = random.Random(0)
+    codes, descs, units, prices = [], [], [], []
+    for i in range(size):
+        category = rng.choice(CATEGORIES)
+        codes.append(f"{category[:3].upper()}{i:07d}")
+        descs.append(f"{category} {rng.choice(ACTIONS)} per {rng.choice(UNITS)}{rng.choice(GRADES)} #{i % 997}")
+        units.append(rng.choice(UNITS))
+        prices.append(round(rng.uniform(0.5, 500), 2))
+    return codes, descs, units, prices
+
+def build_dict(codes, descs, units, prices):
+    """The layout main.py used before the Catalog class"""
+    return {
+        code: {"desc": desc, "unit": unit, "price": price}
+        for code, desc, unit, price in zip(codes, descs, units, prices)
+    }
+
+def measure(build, columns):
+    """Memory still held once the input columns are gone, and build time"""
+    tracemalloc.start()
+    # Fresh string copies, so whatever the store keeps alive is counted
+    columns = [[value[:1] + value[1:] if isinstance(value, str) else value for value in col] for col in columns]
+    start = time.perf_counter()
+    store = build(*columns)
+    elapsed = time.perf_counter() - start
+    del columns
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, current, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'items':>10}{'dict (MB)':>12}{'B/item':>8}{'Catalog (MB)':>14}{'B/item':>8}{'ratio':>8}{'build (s)':>11}")
+    for size in args.sizes:
+        columns = make_columns(size)
+        _, dict_bytes, _ = measure(build_dict, columns)
+        catalog, catalog_bytes, build_time = measure(Catalog.from_columns, columns)
+        # Sanity check that the packed store answers the same questions
+        assert catalog[columns[0][size // 2]].desc == columns[1][size // 2]
+        print(
+            f"{size:>10}{dict_bytes / 1e6:>12.1f}{dict_bytes / size:>8.0f}"
+            f"{catalog_bytes / 1e6:>14.1f}{catalog_bytes / size:>8.0f}"
+            f"{dict_bytes / catalog_bytes:>7.1f}x{build_time:>11.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Cold-start time and peak RSS: parsing the catalog CSV versus opening the compiled file.
+
+Each variant runs in a fresh interpreter so import costs (pandas in
+particular) are included. Peak RSS is read from /proc, so this is Linux
+only. Run from the repository root:
+
+    python backend/benchmarks/bench_catalog_startup.py --rows 100000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_catalog_load import make_csv
+from catalog import Catalog, compile_catalog, compiled_path_for, file_sha256, read_catalog
+
+FROM_CSV = """
+from catalog import Catalog, read_catalog
+items, _ = read_catalog(CSV)
+catalog = Catalog.from_frame(items)
+"""
+
+FROM_COMPILED = """
+from catalog import open_compiled
+catalog = open_compiled(XCAT, CSV)
+"""
+
+# VmHWM is reset by exec, unlike ru_maxrss which would include the forking parent
+PRINT_PEAK_RSS = """
+with open("/proc/self/status") as f:
+    print(next(line.split()[1] for line in f if line.startswith("VmHWM:")))
+"""
+
+def run(snippet, csv_path, repeat):
+    """Best wall time and peak RSS (MB) of a child interpreter running `snippet`"""
+    code = f"import sys; sys.path.insert(0, {BACKEND_DIR!r})\nCSV = {csv_path!r}\nXCAT = {compiled_path_for(csv_path)!r}\n"
+    code += snippet + "catalog[catalog.code(len(catalog) - 1)]\n" + PRINT_PEAK_RSS
+    best_time, best_rss = float("inf"), float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        best_time = min(best_time, time.perf_counter() - start)
+        best_rss = min(best_rss, int(out.split()[-1]) / 1024)
+    return best_time, best_rss
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "catalog.csv")
+        make_csv(csv_path, args.rows, 0)
+        items, _ = read_catalog(csv_path)
+        compile_catalog(Catalog.from_frame(items, file_sha256(csv_path).hex()), compiled_path_for(csv_path), csv_path)
+
+        csv_time, csv_rss = run(FROM_CSV, csv_path, args.repeat)
+        bin_time, bin_rss = run(FROM_COMPILED, csv_path, args.repeat)
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    print(f"{'':<10}{'start (s)':>11}{'RSS (MB)':>10}")
+    print(f"{'csv':<10}{csv_time:>11.3f}{csv_rss:>10.1f}")
+    print(f"{'compiled':<10}{bin_time:>11.3f}{bin_rss:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Total memory of N worker processes holding the catalog: private copy versus shared mapping.
+
+Each worker loads the catalog, touches every item, then waits while the
+proportional set size (Pss) of all workers is summed from /proc, so shared
+pages are only counted once overall. Linux only. Run from the repository root:
+
+    python backend/benchmarks/bench_catalog_workers.py --rows 200000 --workers 1 2 4 8
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND_DIR)
+
+from bench_catalog_load import make_csv
+from catalog import Catalog, compile_catalog, compiled_path_for, file_sha256, read_catalog
+
+PRIVATE = "from catalog import Catalog, read_catalog\ncatalog = Catalog.from_frame(read_catalog(CSV)[0])\n"
+SHARED = "from catalog import open_compiled\ncatalog = open_compiled(XCAT, CSV)\n"
+# Touch every item so all of the catalog is resident, then wait for the parent
+WAIT = "for item in catalog: pass\nprint('ready', flush=True)\nsys.stdin.read()\n"
+
+def total_pss_mb(pids):
+    total = 0
+    for pid in pids:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            total += next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+    return total / 1024
+
+def measure(snippet, csv_path, workers):
+    code = f"import sys; sys.path.insert(0, {BACKEND_DIR!r})\nCSV = {csv_path!r}\nXCAT = {compiled_path_for(csv_path)!r}\n"
+    procs = [
+        subprocess.Popen([sys.executable, "-c", code + snippet + WAIT], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    try:
+        for proc in procs:
+            proc.stdout.readline()
+        return total_pss_mb(proc.pid for proc in procs)
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "catalog.csv")
+        make_csv(csv_path, args.rows, 0)
+        items, _ = read_catalog(csv_path)
+        compile_catalog(Catalog.from_frame(items, file_sha256(csv_path).hex()), compiled_path_for(csv_path), csv_path)
+
+        print(f"{args.rows} rows, total Pss of all workers")
+        print(f"{'workers':>8}{'private (MB)':>14}{'shared (MB)':>13}")
+        for workers in args.workers:
+            private = measure(PRIVATE, csv_path, workers)
+            shared = measure(SHARED, csv_path, workers)
+            print(f"{workers:>8}{private:>14.1f}{shared:>13.1f}")
+
+if __name__ == "__main__":
+    main()
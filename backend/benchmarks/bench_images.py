@@ -0,0 +1,79 @@
+"""Compare report size and render time with and without the image pipeline.
+
+Run from the repository root:
+
+    python backend/benchmarks/bench_images.py --photos 12 --width 4032 --height 3024
+
+fpdf2 copies JPEG originals into the PDF without decoding them, so for JPEG
+jobs the pipeline trades some render time for a much smaller file; PNG
+originals are decoded and recompressed by fpdf2 either way.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+from PIL import Image
+
+import imaging
+from report import render_report, stored_photos
+from storage import LocalStorage, use_storage
+
+def make_photo(rng, width, height):
+    """A textured image that compresses roughly like a real photo"""
+    # Coarse blotches upscaled to full size, plus fine sensor-like grain
+    coarse = rng.integers(0, 256, (height // 16, width // 16, 3), dtype=np.uint8)
+    pixels = np.asarray(Image.fromarray(coarse).resize((width, height), Image.BICUBIC), dtype=np.int16)
+    pixels += rng.integers(-6, 7, pixels.shape, dtype=np.int16)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+def make_job(job_dir, photos, width, height, fmt):
+    """Create a job with textured photos that compress roughly like real ones"""
+    insp_dir = os.path.join(job_dir, "inspection")
+    os.makedirs(insp_dir)
+    rng = np.random.default_rng(0)
+    for i in range(photos):
+        photo = make_photo(rng, width, height)
+        photo.save(os.path.join(insp_dir, f"photo_{i:03d}.{fmt}"), quality=92)
+    with open(os.path.join(job_dir, "notes.txt"), "w", encoding="utf-8") as f:
+        f.write("Synthetic benchmark job")
+
+def run(dpi):
+    imaging.REPORT_IMAGE_DPI = dpi
+    start = time.perf_counter()
+    _, size = render_report("benchmark", [], stored_photos("benchmark"))
+    return time.perf_counter() - start, size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos", type=int, default=12)
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--format", choices=("jpg", "png"), default="jpg")
+    parser.add_argument("--dpi", type=int, default=imaging.REPORT_IMAGE_DPI)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        use_storage(LocalStorage(root))
+        job_dir = os.path.join(root, "benchmark")
+        make_job(job_dir, args.photos, args.width, args.height, args.format)
+        originals = sum(
+            os.path.getsize(os.path.join(job_dir, "inspection", name))
+            for name in os.listdir(os.path.join(job_dir, "inspection"))
+        )
+        print(f"{args.photos} {args.format} photos at {args.width}x{args.height}, {originals / 1e6:.1f} MB of originals")
+
+        before_time, before_size = run(0)
+        after_time, after_size = run(args.dpi)
+
+    print(f"{'':<22}{'render (s)':>12}{'size (MB)':>12}")
+    print(f"{'originals':<22}{before_time:>12.2f}{before_size / 1e6:>12.2f}")
+    print(f"{f'pipeline @ {args.dpi} dpi':<22}{after_time:>12.2f}{after_size / 1e6:>12.2f}")
+    print(f"report {before_size / after_size:.1f}x smaller, render time x{after_time / before_time:.2f}")
+
+if __name__ == "__main__":
+    main()
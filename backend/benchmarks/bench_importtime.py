@@ -0,0 +1,58 @@
+"""Profile `import main` with -X importtime in a fresh interpreter.
+
+Prints the total time to import the app (which used to include loading the
+catalog) and the slowest modules by cumulative time. Run from the
+repository root:
+
+    python backend/benchmarks/bench_importtime.py --top 15
+
+A baseline from this script is kept in importtime_baseline.txt next to it.
+"""
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def profile(backend_dir):
+    """Return [(cumulative_us, self_us, depth, module)] for one `import main`"""
+    with tempfile.TemporaryDirectory() as cwd:
+        # main.py resolves the catalog and fonts relative to the working directory
+        os.makedirs(os.path.join(cwd, "backend"))
+        for name in ("xactimate_ca.csv", "xactimate_ca.xcat"):
+            if os.path.exists(os.path.join(backend_dir, name)):
+                shutil.copy(os.path.join(backend_dir, name), os.path.join(cwd, "backend", name))
+        code = f"import sys; sys.path.insert(0, {backend_dir!r}); import main"
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code], cwd=cwd, capture_output=True, text=True, check=True
+        )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", default=BACKEND_DIR, help="backend directory to profile")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [profile(os.path.abspath(args.backend)) for _ in range(args.repeat)]
+    best = min(runs, key=lambda rows: next(r[0] for r in rows if r[3] == "main"))
+    total = next(r for r in best if r[3] == "main")
+    print(f"import main: {total[0] / 1000:.1f} ms (best of {args.repeat}, {total[1] / 1000:.1f} ms in main itself)")
+    print(f"{'cumulative (ms)':>16}{'self (ms)':>11}  module")
+    for cumulative_us, self_us, depth, name in sorted(best, reverse=True)[1:args.top + 1]:
+        print(f"{cumulative_us / 1000:>16.1f}{self_us / 1000:>11.1f}  {'  ' * depth}{name}")
+
+if __name__ == "__main__":
+    main()
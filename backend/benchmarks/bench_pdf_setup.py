@@ -0,0 +1,49 @@
+"""Microbenchmark PDF() construction: cached font versus add_font() per document.
+
+Run from the repository root:
+
+    python backend/benchmarks/bench_pdf_setup.py --repeat 200
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fpdf import FPDF
+
+from pdf import FONT_FAMILY, FONT_PATH, PDF
+
+def uncached():
+    """What PDF() used to do: parse the TTF for every document"""
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_font(FONT_FAMILY, "", FONT_PATH)
+    pdf.set_font(FONT_FAMILY, size=12)
+    return pdf
+
+def per_call_ms(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    if not os.path.exists(FONT_PATH):
+        raise SystemExit(f"{FONT_PATH} not found; run from the repository root")
+
+    start = time.perf_counter()
+    PDF()
+    first_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'':<26}{'ms per PDF()':>14}")
+    print(f"{'add_font per document':<26}{per_call_ms(uncached, args.repeat):>14.2f}")
+    print(f"{'cached, first in process':<26}{first_ms:>14.2f}")
+    print(f"{'cached, warm':<26}{per_call_ms(PDF, args.repeat):>14.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Time each phase of report rendering on a synthetic job and save the results as JSON.
+
+Run from the repository root:
+
+    python backend/benchmarks/bench_report.py --photos 24 --width 4032 --height 3024 --output report.json
+
+Builds a job with the given number of photos (split between the before and
+after sections), notes and scope of the given length and a catalog of the
+given size, then renders its report --repeat times and reports the best and
+median seconds spent in each phase: PDF setup, text layout, image embedding,
+the line-item table and pdf.output(). With local storage, --derivatives
+makes the print copies first, as the upload endpoints do, so the run measures
+the usual path; without it every photo is scaled while rendering.
+
+The JSON records the commit and parameters alongside the timings. Pass an
+earlier file as --compare to print the change per phase, for example:
+
+    git stash && python backend/benchmarks/bench_report.py --output before.json
+    git stash pop && python backend/benchmarks/bench_report.py --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+
+import imaging
+from bench_images import make_photo
+from catalog import Catalog
+from pdf import FONT_PATH
+from report import PHOTO_SECTIONS, Photo, render_report_bytes
+from storage import LocalStorage, MemoryStorage, use_storage
+
+PHASES = ("setup", "text", "images", "table", "output")
+WORDS = (
+    "water damage drywall ceiling stain north wall baseboard removed moisture reading "
+    "kitchen subfloor replace paint seal texture match carpet pad dehumidifier day"
+).split()
+
+def make_text(rng, chars):
+    """Roughly `chars` characters of notes-like prose, in lines of a sentence or so"""
+    lines, length = [], 0
+    while length < chars:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))).capitalize() + "."
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)[:chars]
+
+def make_catalog(items):
+    rng = random.Random(0)
+    codes = [f"ITEM{i:07d}" for i in range(items)]
+    descs = [f"Synthetic line item {i} per sq ft - economy grade" for i in range(items)]
+    prices = [round(rng.uniform(0.5, 500), 2) for _ in range(items)]
+    return Catalog.from_columns(codes, descs, ["SF"] * items, prices, version="benchmark")
+
+def add_photo(storage, key, data):
+    """Store a photo the way the upload endpoints do and return its Photo"""
+    digest = hashlib.sha256(data).hexdigest()
+    tmp_path = storage.incoming_path()
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    path, _ = storage.add_photo(tmp_path, digest, key)
+    return path, Photo(key.split("/")[1], key, len(data), digest)
+
+def make_job(storage, job_id, args):
+    """Write the synthetic job into `storage`; returns (photos, local photo paths)"""
+    rng = random.Random(0)
+    storage.put(f"{job_id}/notes.txt", make_text(rng, args.notes_chars).encode("utf-8"))
+    storage.put(f"{job_id}/scope.txt", make_text(rng, args.scope_chars).encode("utf-8"))
+
+    pixels = np.random.default_rng(0)
+    photos, paths = [], []
+    for i in range(args.photos):
+        _, phase = PHOTO_SECTIONS[i % len(PHOTO_SECTIONS)]
+        out = tempfile.SpooledTemporaryFile()
+        make_photo(pixels, args.width, args.height).save(out, "PNG" if args.format == "png" else "JPEG", quality=92)
+        out.seek(0)
+        path, photo = add_photo(storage, f"{job_id}/{phase}/photo_{i:03d}.{args.format}", out.read())
+        photos.append(photo)
+        if path:
+            paths.append(path)
+    return photos, paths
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    catalog = make_catalog(args.catalog_items)
+    line_items = catalog[:args.line_items]
+
+    with tempfile.TemporaryDirectory() as root:
+        storage = LocalStorage(root) if args.storage == "local" else MemoryStorage()
+        use_storage(storage)
+        photos, paths = make_job(storage, "benchmark", args)
+        if args.derivatives:
+            imaging.make_all_derivatives(paths)
+
+        # The first render pays for importing fpdf and loading the font
+        start = time.perf_counter()
+        render_report_bytes("benchmark", line_items, photos)
+        cold = time.perf_counter() - start
+
+        runs, size = [], 0
+        for _ in range(args.repeat):
+            timings = {}
+            start = time.perf_counter()
+            size = len(render_report_bytes("benchmark", line_items, photos, timings=timings))
+            timings["total"] = time.perf_counter() - start
+            runs.append(timings)
+
+    phases = {
+        phase: {
+            "best": min(timings[phase] for timings in runs),
+            "median": statistics.median(timings[phase] for timings in runs),
+        }
+        for phase in PHASES + ("total",)
+    }
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "params": {
+            name: getattr(args, name)
+            for name in ("photos", "width", "height", "format", "notes_chars", "scope_chars",
+                         "catalog_items", "line_items", "storage", "derivatives", "repeat")
+        },
+        "settings": {"dpi": imaging.REPORT_IMAGE_DPI, "jpeg_quality": imaging.REPORT_JPEG_QUALITY},
+        "report_bytes": size,
+        "cold_seconds": cold,
+        "phases": phases,
+        "runs": runs,
+    }
+
+def print_results(results, baseline=None):
+    params = results["params"]
+    print(
+        f"{params['photos']} {params['format']} photos at {params['width']}x{params['height']}, "
+        f"{params['notes_chars']}+{params['scope_chars']} chars of text, "
+        f"{params['line_items']} of {params['catalog_items']} catalog items, {params['storage']} storage"
+    )
+    print(f"report {results['report_bytes'] / 1e6:.2f} MB, first render {results['cold_seconds']:.3f} s")
+    header = f"{'phase':<8}{'best (ms)':>11}{'median (ms)':>13}"
+    if baseline:
+        header += f"{'baseline (ms)':>15}{'change':>9}"
+    print(header)
+    for phase, stats in results["phases"].items():
+        line = f"{phase:<8}{stats['best'] * 1000:>11.1f}{stats['median'] * 1000:>13.1f}"
+        if baseline and phase in baseline["phases"]:
+            before = baseline["phases"][phase]["median"]
+            change = f"{(stats['median'] / before - 1) * 100:+.0f}%" if before else "n/a"
+            line += f"{before * 1000:>15.1f}{change:>9}"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos", type=int, default=12)
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--format", choices=("jpg", "png"), default="jpg")
+    parser.add_argument("--notes-chars", type=int, default=2000)
+    parser.add_argument("--scope-chars", type=int, default=2000)
+    parser.add_argument("--catalog-items", type=int, default=20000)
+    parser.add_argument("--line-items", type=int, default=5, help="items put in the table; the endpoint uses 5")
+    parser.add_argument("--storage", choices=("local", "memory"), default="local")
+    parser.add_argument("--derivatives", action="store_true", help="make print copies before rendering (local storage)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write the results here as JSON")
+    parser.add_argument("--compare", help="JSON from an earlier run to compare against")
+    args = parser.parse_args()
+    if not os.path.exists(FONT_PATH):
+        raise SystemExit(f"{FONT_PATH} not found; run from the repository root")
+
+    results = run(args)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["params"] != results["params"]:
+            print(f"⚠️ {args.compare} was run with different parameters: {baseline['params']}")
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
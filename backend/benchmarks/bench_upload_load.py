@@ -0,0 +1,214 @@
+"""Load test the upload endpoints: latency percentiles, throughput and errors by concurrency.
+
+Run from the repository root:
+
+    python backend/benchmarks/bench_upload_load.py --concurrency 1 4 16 --duration 20
+    python backend/benchmarks/bench_upload_load.py --target inprocess --files 2 --width 2016 --height 1512
+
+Each simulated client creates a job with /upload-inspection (notes, scope
+and photos) and then keeps sending batches of photos to /upload-work/{job_id}
+until the level's time is up, as a crew on site would. Photos are real JPEGs
+of the given size. Each upload gets a few random trailing bytes, so every
+file has a new hash and content dedup does not flatter the numbers.
+
+--target uvicorn (the default) starts a server in a scratch directory and
+measures what clients see. --target inprocess drives the app through httpx's
+ASGI transport without a socket. That is quicker to set up and easier to
+profile, but the load generator shares the event loop with the app. httpx
+also waits for background tasks there, so latencies include making the
+photo derivatives. --target URL load tests a server that is already running.
+
+For each level it prints p50/p95/p99 latency per endpoint, the MB/s of
+photos accepted and the error rate. An error is a failed request, or a
+response that reports a file it could not store. --output saves everything
+as JSON.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_images import make_photo
+from bench_uploads import BACKEND_DIR, free_port, start_server
+from bench_report import git_commit
+
+ENDPOINTS = ("inspection", "work")
+
+def make_payloads(count, width, height):
+    """A few distinct JPEGs to draw uploads from; making them is the slow part"""
+    rng = np.random.default_rng(0)
+    payloads = []
+    for _ in range(count):
+        with tempfile.SpooledTemporaryFile() as out:
+            make_photo(rng, width, height).save(out, "JPEG", quality=92)
+            out.seek(0)
+            payloads.append(out.read())
+    return payloads
+
+def percentile(values, pct):
+    """Nearest-rank percentile; None when there is nothing to rank"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))]
+
+class Client:
+    """One simulated uploader: a job of its own, then batches of work photos"""
+
+    def __init__(self, http, payloads, files, stats):
+        self.http = http
+        self.payloads = payloads
+        self.files = files
+        self.stats = stats
+        self.job_id = None
+        self.sent = 0
+
+    def batch(self):
+        files = []
+        for _ in range(self.files):
+            self.sent += 1
+            # A fresh tail gives every upload its own hash; JPEG readers stop at the end marker
+            data = random.choice(self.payloads) + os.urandom(16)
+            files.append(("files", (f"IMG_{self.sent:04d}.jpg", data, "image/jpeg")))
+        return files
+
+    async def send(self, endpoint, url, **kwargs):
+        files = kwargs["files"]
+        start = time.perf_counter()
+        try:
+            r = await self.http.post(url, **kwargs)
+            ok = r.status_code < 400 and not any("error" in f for f in r.json().get("files", []))
+            body = r.json() if ok else None
+        except (httpx.HTTPError, ValueError):
+            ok, body = False, None
+        self.stats[endpoint]["latencies"].append(time.perf_counter() - start)
+        if ok:
+            self.stats[endpoint]["bytes"] += sum(len(data) for _, (_, data, _) in files)
+        else:
+            self.stats[endpoint]["errors"] += 1
+        return body
+
+    async def run(self, deadline):
+        while self.job_id is None and time.perf_counter() < deadline:
+            body = await self.send(
+                "inspection", "/upload-inspection",
+                files=self.batch(), data={"notes": "Load test job", "scope": "Load test scope"},
+            )
+            self.job_id = body and body.get("job_id")
+        while time.perf_counter() < deadline:
+            await self.send("work", f"/upload-work/{self.job_id}", files=self.batch())
+
+async def run_level(http, payloads, files, concurrency, duration):
+    stats = {endpoint: {"latencies": [], "bytes": 0, "errors": 0} for endpoint in ENDPOINTS}
+    clients = [Client(http, payloads, files, stats) for _ in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client.run(start + duration) for client in clients))
+    elapsed = time.perf_counter() - start
+
+    result = {"concurrency": concurrency, "seconds": elapsed, "endpoints": {}}
+    for endpoint, s in stats.items():
+        result["endpoints"][endpoint] = {
+            "requests": len(s["latencies"]),
+            "errors": s["errors"],
+            "p50": percentile(s["latencies"], 50),
+            "p95": percentile(s["latencies"], 95),
+            "p99": percentile(s["latencies"], 99),
+            "mb_per_s": s["bytes"] / 1e6 / elapsed,
+        }
+    return result
+
+@contextlib.asynccontextmanager
+async def inprocess_client(workdir):
+    """The app in this process, with its working directory set up as at the repository root"""
+    os.makedirs(os.path.join(workdir, "backend"))
+    os.symlink(os.path.join(BACKEND_DIR, "xactimate_ca.csv"), os.path.join(workdir, "backend", "xactimate_ca.csv"))
+    os.chdir(workdir)
+    import main
+
+    # ASGITransport does not send lifespan events, so run startup here
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=None) as http:
+            yield http
+
+@contextlib.asynccontextmanager
+async def server_client(base_url, limit):
+    limits = httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as http:
+        yield http
+
+def fmt_ms(seconds):
+    return f"{seconds * 1000:.0f}" if seconds is not None else "-"
+
+def print_level(result):
+    for endpoint, s in result["endpoints"].items():
+        if not s["requests"]:
+            continue
+        print(
+            f"{result['concurrency']:>8}  {endpoint:<11}{s['requests']:>9}{s['errors'] / s['requests'] * 100:>8.1f}%"
+            f"{fmt_ms(s['p50']):>9}{fmt_ms(s['p95']):>9}{fmt_ms(s['p99']):>9}{s['mb_per_s']:>9.1f}"
+        )
+
+async def run(args, http):
+    payloads = make_payloads(args.distinct, args.width, args.height)
+    mean_mb = sum(map(len, payloads)) / len(payloads) / 1e6
+    print(f"{args.files} photos of ~{mean_mb:.1f} MB ({args.width}x{args.height} JPEG) per request, {args.duration:g} s per level")
+    print(f"{'clients':>8}  {'endpoint':<11}{'requests':>9}{'errors':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'MB/s':>9}")
+    levels = []
+    for concurrency in args.concurrency:
+        result = await run_level(http, payloads, args.files, concurrency, args.duration)
+        print_level(result)
+        levels.append(result)
+    return levels
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="uvicorn", help="uvicorn, inprocess, or the URL of a running server")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--duration", type=float, default=10, help="seconds per concurrency level")
+    parser.add_argument("--files", type=int, default=3, help="photos per request")
+    parser.add_argument("--width", type=int, default=4032)
+    parser.add_argument("--height", type=int, default=3024)
+    parser.add_argument("--distinct", type=int, default=4, help="distinct photos to generate")
+    parser.add_argument("--output", help="write the results here as JSON")
+    args = parser.parse_args()
+    commit = git_commit()
+
+    async def go():
+        with tempfile.TemporaryDirectory() as workdir:
+            if args.target == "inprocess":
+                async with inprocess_client(workdir) as http:
+                    return await run(args, http)
+            server = None
+            base_url = args.target
+            if args.target == "uvicorn":
+                port = free_port()
+                server = start_server(workdir, port)
+                base_url = f"http://127.0.0.1:{port}"
+            try:
+                async with server_client(base_url, max(args.concurrency)) as http:
+                    return await run(args, http)
+            finally:
+                if server:
+                    server.terminate()
+                    server.wait()
+
+    levels = asyncio.run(go())
+    if args.output:
+        params = {name: getattr(args, name) for name in ("target", "duration", "files", "width", "height", "distinct")}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"commit": commit, "params": params, "levels": levels}, f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
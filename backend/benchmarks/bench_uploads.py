@@ -0,0 +1,105 @@
+"""Load test: concurrent photo uploads against a live server.
+
+Starts uvicorn in a scratch directory, then for each concurrency level sends
+that many /upload-work requests at once while probing /healthz. When uploads
+are written on the event loop they serialize and health checks stall for the
+whole batch; written on the I/O pool, aggregate throughput should grow with
+concurrency and /healthz should stay fast. Multipart parsing still runs on
+the event loop, so /healthz latency grows somewhat with the number of bytes
+in flight either way. Run from the repository root:
+
+    python backend/benchmarks/bench_uploads.py --size-mb 64 --concurrency 1 2 4 8
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(workdir, port):
+    # main.py resolves jobs/ and backend/xactimate_ca.csv against the working directory
+    os.makedirs(os.path.join(workdir, "backend"))
+    os.symlink(os.path.join(BACKEND_DIR, "xactimate_ca.csv"), os.path.join(workdir, "backend", "xactimate_ca.csv"))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", BACKEND_DIR, "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, stdout=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/healthz").raise_for_status()
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+async def probe(client, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/healthz")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+
+async def run_level(client, job_id, payload, concurrency):
+    async def upload(i):
+        r = await client.post(f"/upload-work/{job_id}", files={"files": (f"load_{concurrency}_{i}.dat", payload)})
+        r.raise_for_status()
+
+    stop, latencies = asyncio.Event(), []
+    prober = asyncio.create_task(probe(client, stop, latencies))
+    start = time.perf_counter()
+    await asyncio.gather(*(upload(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+    return elapsed, max(latencies, default=0.0)
+
+async def run(port, size_mb, levels):
+    payload = os.urandom(size_mb * 1024 * 1024)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+        r = await client.post(
+            "/upload-inspection", files={"files": ("seed.dat", b"seed")}, data={"notes": "Upload load test", "scope": "None"}
+        )
+        job_id = r.json()["job_id"]
+
+        print(f"{size_mb} MB per upload")
+        print(f"{'uploads':>8}{'wall (s)':>10}{'MB/s':>9}{'vs serial':>11}{'max healthz (ms)':>18}")
+        single = None
+        for concurrency in levels:
+            elapsed, worst_probe = await run_level(client, job_id, payload, concurrency)
+            single = single or elapsed / concurrency
+            print(
+                f"{concurrency:>8}{elapsed:>10.2f}{size_mb * concurrency / elapsed:>9.1f}"
+                f"{single * concurrency / elapsed:>10.1f}x{worst_probe * 1000:>18.0f}"
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        server = start_server(workdir, port)
+        try:
+            asyncio.run(run(port, args.size_mb, args.concurrency))
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Report-size check: embedded font bytes must track the distinct characters used.
+
+Renders reports whose notes, scope and line items use a growing set of
+characters, then reads the embedded font programs back out of the PDF.
+Exits non-zero if the PDF class would embed more glyphs than the text has
+distinct characters, or if the font grows faster than BYTES_PER_GLYPH;
+either means subsetting stopped working. Run from the repository root:
+
+    python backend/benchmarks/check_font_subset.py
+"""
+import os
+import re
+import sys
+import string
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from catalog import LineItem
+from pdf import FONT_PATH, PDF
+from report import render_report
+from storage import MemoryStorage, use_storage
+
+# Fixed cost of a subset font (tables, .notdef, required glyphs) and the
+# allowance per drawn glyph; DejaVu measures about 4 KB + 110 B/glyph
+BASE_BYTES = 8_000
+BYTES_PER_GLYPH = 250
+# .notdef, .null, CR and space may be added on top of what is drawn
+REQUIRED_GLYPHS = 4
+
+CHARSETS = [
+    ("digits", string.digits),
+    ("ascii", string.ascii_letters + string.digits + string.punctuation),
+    ("latin-1", "".join(chr(c) for c in range(0xC0, 0x180))),
+    ("greek+cyrillic", "".join(chr(c) for c in [*range(0x391, 0x3A2), *range(0x3A3, 0x3CA), *range(0x410, 0x450)])),
+]
+
+def embedded_font_bytes(pdf_bytes):
+    """Uncompressed size of every embedded TrueType program (/Length1)"""
+    return sum(int(n) for n in re.findall(rb"/Length1 (\d+)", pdf_bytes))
+
+def drawn_text(job_id, notes, scope, line_items):
+    """Every string render_report() draws for a job without photos"""
+    parts = [f"Inspection Report – Job {job_id}", f"Inspector Notes:\n{notes}", f"\nScope (Team Entry):\n{scope}"]
+    if line_items:
+        parts += ["Xactimate Line Items", "Code", "Description", "Price"]
+        parts += [f"{item.code}{item.desc[:40]}${item.price:.2f}" for item in line_items]
+    return "".join(parts)
+
+def main():
+    if not os.path.exists(FONT_PATH):
+        raise SystemExit(f"{FONT_PATH} not found; run from the repository root")
+
+    storage = MemoryStorage()
+    use_storage(storage)
+    failures = []
+    used = ""
+    print(f"{'charset':<16}{'distinct':>9}{'glyphs':>8}{'font bytes':>12}{'limit':>9}{'report bytes':>14}")
+    for name, chars in CHARSETS:
+        used += chars
+        notes = " ".join(used[i:i + 40] for i in range(0, len(used), 40))
+        scope = used[::-1]
+        line_items = [LineItem(f"CODE{i}", used[i * 7:i * 7 + 40] or "item", "EA", i * 1.25) for i in range(5)]
+
+        storage.put("subset-check/notes.txt", notes.encode("utf-8"))
+        storage.put("subset-check/scope.txt", scope.encode("utf-8"))
+        report_key, _ = render_report("subset-check", line_items, [])
+        pdf_bytes = storage.get(report_key)
+
+        text = drawn_text("subset-check", notes, scope, line_items)
+        distinct = len(set(text) - {"\n"})
+        pdf = PDF()
+        pdf.add_page()
+        pdf.safe_set_font()
+        pdf.multi_cell(0, 10, text)
+        glyphs = sum(pdf.used_glyphs().values())
+
+        font_bytes = embedded_font_bytes(pdf_bytes)
+        limit = BASE_BYTES + BYTES_PER_GLYPH * (distinct + REQUIRED_GLYPHS)
+        print(f"{name:<16}{distinct:>9}{glyphs:>8}{font_bytes:>12}{limit:>9}{len(pdf_bytes):>14}")
+        if glyphs > distinct + REQUIRED_GLYPHS:
+            failures.append(f"{name}: {glyphs} glyphs selected for {distinct} distinct characters")
+        if not font_bytes:
+            failures.append(f"{name}: no embedded font found")
+        elif font_bytes > limit:
+            failures.append(f"{name}: {font_bytes} font bytes for {distinct} characters (limit {limit})")
+
+    if failures:
+        print("\n".join(["❌ Font subsetting regression:"] + failures))
+        sys.exit(1)
+    print("✅ Embedded font size is proportional to the characters used")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import uuid
+import shutil
+from atomic import replacing
+
+# ========= Content-Addressed Photo Store =========
+# Uploaded bytes are stored once, under UPLOAD_DIR/.blobs/<ab>/<sha256>. A
+# job's photo is a hard link to its blob, so a photo uploaded twice, to both
+# phases or to several jobs takes no extra disk, and every copy shares one
+# inode. Blobs are never written in place once stored.
+
+def blob_path(blob_root, digest):
+    # Fan out by prefix so no single folder ends up with every photo
+    return os.path.join(blob_root, digest[:2], digest)
+
+def incoming_path(blob_root):
+    """A temp file to receive an upload before its hash is known. It sits in
+    the blob folder so moving it into place is a rename, not a copy."""
+    os.makedirs(blob_root, exist_ok=True)
+    return os.path.join(blob_root, f"incoming-{uuid.uuid4().hex}.tmp")
+
+def store(blob_root, tmp_path, digest):
+    """Move a fully written temp file into the store, or drop it if that
+    content is already there. Returns (blob path, whether it was new)."""
+    path = blob_path(blob_root, digest)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+        return path, False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Two uploads of the same bytes may race here; either rename wins with identical content
+    os.replace(tmp_path, path)
+    return path, True
+
+def link(blob, dest):
+    """Point `dest` at `blob`, replacing whatever was there.
+
+    Uses a hard link, falling back to a copy on filesystems without them.
+    The swap is atomic, so a report rendering at the same moment sees
+    either the old photo or the new one.
+    """
+    with replacing(dest) as tmp_path:
+        try:
+            os.link(blob, tmp_path)
+        except OSError:
+            shutil.copyfile(blob, tmp_path)
+    return dest
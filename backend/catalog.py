@@ -0,0 +1,245 @@
+import os
+import sys
+import mmap
+import struct
+import hashlib
+from array import array
+from contextlib import contextmanager
+from bisect import bisect_left
+from typing import NamedTuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, workers may compile twice
+    fcntl = None
+
+# ========= Xactimate Catalog Parsing =========
+CATALOG_COLUMNS = ["Item", "Description", "Unit", "Price"]
+
+def read_catalog(csv_path):
+    """Parse an Xactimate price list column-wise.
+
+    Returns (items, bad_lines): `items` is a DataFrame with the catalog
+    columns stripped and Price as float, one row per code (the last one wins,
+    as before); `bad_lines` lists the CSV line numbers that were dropped
+    because they have no code or a price that is not a number. Empty prices
+    are kept as NaN. Raises ValueError if the header is missing a column.
+    """
+    # Imported here so a process that only opens the compiled catalog never pays for pandas
+    import pandas as pd
+
+    df = pd.read_csv(
+        csv_path,
+        encoding="utf-8",
+        on_bad_lines="skip",
+        dtype=str,
+        keep_default_na=False,
+    )
+    if not set(df.columns) >= set(CATALOG_COLUMNS):
+        raise ValueError(f"CSV header mismatch: {df.columns.tolist()}")
+
+    df = df[CATALOG_COLUMNS].apply(lambda col: col.str.strip())
+    price = pd.to_numeric(df["Price"], errors="coerce")
+    bad = (df["Item"] == "") | (price.isna() & (df["Price"] != ""))
+
+    items = df.assign(Price=price)[~bad].drop_duplicates("Item", keep="last")
+    # +2: pandas rows are 0-based and the header takes line 1
+    bad_lines = (df.index[bad] + 2).tolist()
+    return items, bad_lines
+
+# ========= Compact Catalog Store =========
+class LineItem(NamedTuple):
+    code: str
+    desc: str
+    unit: str
+    price: float
+
+class Catalog:
+    """Read-only Xactimate catalog packed into a handful of flat buffers.
+
+    Every distinct string (codes, descriptions, units) is stored once in a
+    UTF-8 blob and items refer to it by id, so an entry costs a few array
+    slots instead of a dict plus its strings. `by_code` holds item positions
+    sorted by code and serves as the code -> index map via binary search.
+    LineItem records are only built when an item is asked for.
+    """
+
+    def __init__(self, strings, offsets, code_ids, desc_ids, unit_ids, prices, by_code, version=""):
+        self.version = version
+        self.strings = strings
+        self.offsets = offsets
+        self.code_ids = code_ids
+        self.desc_ids = desc_ids
+        self.unit_ids = unit_ids
+        self.prices = prices
+        self.by_code = by_code
+
+    @classmethod
+    def from_columns(cls, codes, descs, units, prices, version=""):
+        """Pack parallel columns; codes must already be unique"""
+        string_ids = {}
+        blob = bytearray()
+        offsets = array("Q", [0])
+
+        def intern(value):
+            string_id = string_ids.get(value)
+            if string_id is None:
+                string_id = string_ids[value] = len(offsets) - 1
+                blob.extend(value.encode("utf-8"))
+                offsets.append(len(blob))
+            return string_id
+
+        code_ids = array("I", map(intern, codes))
+        desc_ids = array("I", map(intern, descs))
+        unit_ids = array("I", map(intern, units))
+        by_code = array("I", sorted(range(len(codes)), key=codes.__getitem__))
+        return cls(bytes(blob), offsets, code_ids, desc_ids, unit_ids, array("d", prices), by_code, version)
+
+    @classmethod
+    def from_frame(cls, items, version=""):
+        """Pack the DataFrame returned by read_catalog()"""
+        return cls.from_columns(
+            items["Item"].tolist(), items["Description"].tolist(), items["Unit"].tolist(), items["Price"].tolist(),
+            version,
+        )
+
+    def string(self, string_id):
+        # str() rather than .decode() so the blob may also be a memoryview
+        return str(self.strings[self.offsets[string_id]:self.offsets[string_id + 1]], "utf-8")
+
+    def code(self, index):
+        return self.string(self.code_ids[index])
+
+    def item(self, index):
+        return LineItem(
+            self.string(self.code_ids[index]),
+            self.string(self.desc_ids[index]),
+            self.string(self.unit_ids[index]),
+            self.prices[index],
+        )
+
+    def index(self, code):
+        """Position of `code` in the catalog, or -1"""
+        by_code = self.by_code
+        pos = bisect_left(by_code, code, key=self.code)
+        if pos < len(by_code) and self.code(by_code[pos]) == code:
+            return by_code[pos]
+        return -1
+
+    def get(self, code, default=None):
+        index = self.index(code)
+        return self.item(index) if index >= 0 else default
+
+    def __getitem__(self, key):
+        """catalog["DRY001"] looks an item up by code; catalog[:5] slices by position"""
+        if isinstance(key, slice):
+            return [self.item(i) for i in range(*key.indices(len(self)))]
+        index = self.index(key)
+        if index < 0:
+            raise KeyError(key)
+        return self.item(index)
+
+    def __contains__(self, code):
+        return self.index(code) >= 0
+
+    def __len__(self):
+        return len(self.code_ids)
+
+    def __iter__(self):
+        return map(self.item, range(len(self)))
+
+    def codes(self):
+        return map(self.code, range(len(self)))
+
+# ========= Compiled Catalog File =========
+# A compiled catalog is the Catalog buffers written back to back after a
+# fixed header, so opening it is an mmap plus a few memoryview casts instead
+# of a CSV parse. Eight-byte columns come first to keep every column aligned.
+# The mapping is read-only and file-backed, so every process that opens the
+# same file shares one copy of it in the page cache.
+MAGIC = b"XCAT"
+FORMAT_VERSION = 1
+# magic, format version, items, strings, blob bytes, source size, source mtime_ns, source sha256
+HEADER = struct.Struct("<4sIIIQQQ32s")
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+def compile_catalog(catalog, out_path, source_path):
+    """Write `catalog` as a compiled file stamped with the CSV it came from"""
+    st = os.stat(source_path)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(catalog), len(catalog.offsets) - 1, len(catalog.strings),
+        st.st_size, st.st_mtime_ns, bytes.fromhex(catalog.version) if catalog.version else file_sha256(source_path),
+    )
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for column in (catalog.offsets, catalog.prices, catalog.code_ids, catalog.desc_ids, catalog.unit_ids, catalog.by_code):
+            f.write(column)
+        f.write(catalog.strings)
+    os.replace(tmp_path, out_path)
+
+def open_compiled(path, source_path=None):
+    """Map a compiled catalog, or return None if it is missing, from another
+    format version, or older than `source_path`."""
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if len(mapped) < HEADER.size:
+        return None
+    magic, version, items, strings, blob_bytes, size, mtime_ns, sha = HEADER.unpack_from(mapped)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    if source_path and os.path.exists(source_path):
+        st = os.stat(source_path)
+        if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+            return None
+
+    view = memoryview(mapped)
+    pos = HEADER.size
+
+    def column(fmt, count):
+        nonlocal pos
+        end = pos + count * struct.calcsize(fmt)
+        col = view[pos:end].cast(fmt)
+        pos = end
+        return col
+
+    offsets = column("Q", strings + 1)
+    prices = column("d", items)
+    code_ids, desc_ids, unit_ids, by_code = (column("I", items) for _ in range(4))
+    blob = view[pos:pos + blob_bytes]
+    return Catalog(blob, offsets, code_ids, desc_ids, unit_ids, prices, by_code, sha.hex())
+
+def compiled_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + ".xcat"
+
+@contextmanager
+def compile_lock(compiled_path):
+    """Hold an exclusive lock while compiling, so when every uvicorn worker
+    starts against a stale file only the first one parses the CSV."""
+    with open(f"{compiled_path}.lock", "w") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+if __name__ == "__main__":
+    # Build step: python backend/catalog.py [catalog.csv] [catalog.xcat]
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join("backend", "xactimate_ca.csv")
+    out_path = sys.argv[2] if len(sys.argv) > 2 else compiled_path_for(csv_path)
+    items, bad_lines = read_catalog(csv_path)
+    catalog = Catalog.from_frame(items, file_sha256(csv_path).hex())
+    compile_catalog(catalog, out_path, csv_path)
+    print(f"✅ Compiled {len(catalog)} items ({len(bad_lines)} malformed rows skipped) into {out_path}")
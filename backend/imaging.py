@@ -0,0 +1,177 @@
+import os
+import re
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps, ExifTags
+from atomic import write_atomic
+from layout import CELL_WIDTH_MM
+
+# ========= Report Image Pipeline =========
+# Phone photos are far larger than the space they get on the page, so each one
+# is scaled to the print resolution and re-encoded before it goes in the PDF.
+REPORT_IMAGE_DPI = int(os.getenv("REPORT_IMAGE_DPI", 150))  # 0 embeds originals
+REPORT_JPEG_QUALITY = int(os.getenv("REPORT_JPEG_QUALITY", 80))
+THUMBNAIL_PX = int(os.getenv("THUMBNAIL_PX", 320))
+# Pillow releases the GIL while decoding and resizing, so threads use every core
+DERIVATIVE_WORKERS = int(os.getenv("DERIVATIVE_WORKERS", os.cpu_count() or 1))
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+PRINT_WIDTH_MM = CELL_WIDTH_MM  # widest photos are drawn in the report grid
+MM_PER_INCH = 25.4
+# Derivatives sit in a hidden folder beside the originals they were made from
+DERIVED_DIR = ".derived"
+
+def target_pixels(width_mm, dpi):
+    return max(1, round(width_mm / MM_PER_INCH * dpi))
+
+def to_rgb(im):
+    """Flatten transparency onto white, since JPEG has no alpha channel"""
+    if im.mode in ("RGBA", "LA", "P"):
+        im = im.convert("RGBA")
+        background = Image.new("RGB", im.size, (255, 255, 255))
+        background.paste(im, mask=im.getchannel("A"))
+        return background
+    return im.convert("RGB")
+
+def load_rgb(path, max_px):
+    """Open a photo upright and in RGB, decoding at no more than needed for `max_px`"""
+    with Image.open(path) as im:
+        # Let the JPEG decoder skip detail we would throw away anyway; square
+        # so the bound still holds if the photo gets rotated below
+        im.draft("RGB", (max_px, max_px))
+        return to_rgb(ImageOps.exif_transpose(im))
+
+def prepare_image(path, width_mm, dpi=None, quality=None):
+    """Return a JPEG sized for `width_mm` at `dpi`, without any metadata.
+
+    EXIF orientation is applied to the pixels first, because the tag is
+    dropped along with the rest of the metadata. Returns the original path
+    untouched when `dpi` is 0.
+    """
+    dpi = REPORT_IMAGE_DPI if dpi is None else dpi
+    quality = REPORT_JPEG_QUALITY if quality is None else quality
+    if not dpi:
+        return path
+
+    width = target_pixels(width_mm, dpi)
+    im = load_rgb(path, width)
+    if im.width > width:
+        im = im.resize((width, round(im.height * width / im.width)), Image.LANCZOS)
+
+    out = BytesIO()
+    im.save(out, "JPEG", quality=quality, optimize=True)
+    out.seek(0)
+    return out
+
+# ========= Upload-Time Derivatives =========
+def derived_path(photo_path, suffix):
+    folder, name = os.path.split(photo_path)
+    return os.path.join(folder, DERIVED_DIR, f"{name}.{suffix}.jpg")
+
+def print_path(photo_path, dpi=None, quality=None, width_mm=PRINT_WIDTH_MM):
+    """Where the print-size copy lives; named after the settings it was made with"""
+    dpi = REPORT_IMAGE_DPI if dpi is None else dpi
+    quality = REPORT_JPEG_QUALITY if quality is None else quality
+    return derived_path(photo_path, f"{width_mm}mm-{dpi}dpi-q{quality}")
+
+def thumbnail_path(photo_path):
+    return derived_path(photo_path, f"thumb{THUMBNAIL_PX}")
+
+def remove_derivatives(photo_path):
+    """Delete every derivative of a photo, whatever settings made it.
+
+    Needed when a name is pointed at different content: a linked photo keeps
+    its blob's mtime, which may be older than the derivatives already there.
+    """
+    folder, name = os.path.split(photo_path)
+    # Copies named before the width was part of the name have no "<n>mm-"
+    pattern = re.compile(re.escape(name) + r"\.(thumb\d+|(\d+mm-)?\d+dpi-q\d+)\.jpg")
+    try:
+        entries = os.listdir(os.path.join(folder, DERIVED_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if pattern.fullmatch(entry):
+            try:
+                os.remove(os.path.join(folder, DERIVED_DIR, entry))
+            except FileNotFoundError:
+                pass
+
+def is_fresh(derivative, photo_path):
+    try:
+        return os.stat(derivative).st_mtime_ns >= os.stat(photo_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+def make_derivatives(photo_path):
+    """Write the print-size JPEG and thumbnail for one uploaded photo"""
+    if REPORT_IMAGE_DPI:
+        write_atomic(print_path(photo_path), prepare_image(photo_path, PRINT_WIDTH_MM).getvalue())
+
+    im = load_rgb(photo_path, THUMBNAIL_PX)
+    im.thumbnail((THUMBNAIL_PX, THUMBNAIL_PX), Image.LANCZOS)
+    out = BytesIO()
+    im.save(out, "JPEG", quality=REPORT_JPEG_QUALITY, optimize=True)
+    write_atomic(thumbnail_path(photo_path), out.getvalue())
+
+derivative_pool = ThreadPoolExecutor(max_workers=DERIVATIVE_WORKERS, thread_name_prefix="derivatives")
+
+def try_make_derivatives(photo_path):
+    try:
+        make_derivatives(photo_path)
+    except Exception as e:
+        print(f"⚠️ Could not create derivatives for {photo_path}: {e}")
+
+def make_all_derivatives(photo_paths):
+    """Background task run after an upload; a bad photo must not stop the rest.
+
+    Photos are processed in parallel on a pool shared by all uploads, so a
+    burst of uploads still uses at most DERIVATIVE_WORKERS threads.
+    """
+    photos = [path for path in photo_paths if path.lower().endswith(IMAGE_EXTENSIONS)]
+    list(derivative_pool.map(try_make_derivatives, photos))
+
+# EXIF date-times are "YYYY:MM:DD HH:MM:SS", so as strings they sort in time order
+EXIF_DATETIME = re.compile(r"\d{4}:\d{2}:\d{2} \d{2}:\d{2}:\d{2}")
+
+def capture_time(value):
+    """An EXIF date-time, or None for the blanks and junk some cameras write"""
+    value = str(value or "").strip("\x00 ")
+    return value if EXIF_DATETIME.fullmatch(value) else None
+
+def photo_metadata(photo_path, name=None):
+    """Size, format and capture time from the image header, without decoding pixels.
+
+    `name` is the uploaded file name, when `photo_path` is a temp file.
+    Returns {} for files that are not photos, and {"error": ...} for photos
+    Pillow cannot read, so the uploader hears about them straight away.
+    """
+    if not (name or photo_path).lower().endswith(IMAGE_EXTENSIONS):
+        return {}
+    try:
+        with Image.open(photo_path) as im:
+            exif = im.getexif()
+            taken_at = (
+                capture_time(exif.get_ifd(ExifTags.IFD.Exif).get(ExifTags.Base.DateTimeOriginal))
+                or capture_time(exif.get(ExifTags.Base.DateTime))
+            )
+            width, height = im.size
+            # Orientations 5-8 are rotated a quarter turn
+            if exif.get(ExifTags.Base.Orientation, 1) in (5, 6, 7, 8):
+                width, height = height, width
+            return {"width": width, "height": height, "format": im.format, "taken_at": taken_at}
+    except Image.UnidentifiedImageError:
+        # Pillow's message names the temp file, which means nothing to the uploader
+        return {"error": "Unreadable image: not a JPEG or PNG file"}
+    except Exception as e:
+        return {"error": f"Unreadable image: {e}"}
+
+def report_image(photo_path, width_mm=PRINT_WIDTH_MM):
+    """What to embed for a photo: its precomputed print copy when one is
+    current, otherwise a freshly prepared image. `photo_path` may also be a
+    file object, for photos that are not on local disk."""
+    if REPORT_IMAGE_DPI and width_mm == PRINT_WIDTH_MM and isinstance(photo_path, str):
+        derivative = print_path(photo_path)
+        if is_fresh(derivative, photo_path):
+            return derivative
+    return prepare_image(photo_path, width_mm)
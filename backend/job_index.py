@@ -0,0 +1,97 @@
+import sqlite3
+import time
+from report import Photo, PHOTO_SECTIONS
+
+# What each job contains, kept in SQLite so endpoints can answer "does this
+# job exist", "which photos does it have" and "is its report current"
+# without listing folders or stat()ing files in storage. Every upload path
+# records what it stored here; storage stays the home of the bytes.
+
+PHASE_ORDER = {phase: i for i, (_, phase) in enumerate(PHOTO_SECTIONS)}
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_db(db_path):
+    with connect(db_path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                -- bumped whenever anything the report is built from changes
+                revision INTEGER NOT NULL DEFAULT 0,
+                report_digest TEXT,
+                report_size INTEGER,
+                report_rendered_at REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS photos (
+                job_id TEXT NOT NULL,
+                phase TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                -- NULL for photos uploaded straight to storage
+                sha256 TEXT,
+                -- storage's content tag, used when there is no hash
+                tag TEXT,
+                -- EXIF capture time, which orders photos in the report
+                taken_at TEXT,
+                uploaded_at REAL NOT NULL,
+                PRIMARY KEY (job_id, phase, filename)
+            )"""
+        )
+        # Indexes created before capture times were kept
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(photos)")}
+        if "taken_at" not in columns:
+            conn.execute("ALTER TABLE photos ADD COLUMN taken_at TEXT")
+
+def create_job(db_path, job_id):
+    now = time.time()
+    with connect(db_path) as conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO jobs (job_id, created_at, updated_at) VALUES (?, ?, ?)",
+            (job_id, now, now),
+        )
+
+def get_job(db_path, job_id):
+    with connect(db_path) as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+def record_photos(db_path, job_id, phase, photos):
+    """Add or replace photos given as (filename, size, sha256, tag, taken_at)
+    and bump the job's revision, which makes any stored report stale"""
+    now = time.time()
+    with connect(db_path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO photos (job_id, phase, filename, size, sha256, tag, taken_at, uploaded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(job_id, phase, *photo, now) for photo in photos],
+        )
+        conn.execute("UPDATE jobs SET revision = revision + 1, updated_at = ? WHERE job_id = ?", (now, job_id))
+
+def get_photos(db_path, job_id):
+    """The job's photos as report Photos, in report order"""
+    with connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT phase, filename, size, sha256, tag, taken_at FROM photos WHERE job_id = ? ORDER BY filename", (job_id,)
+        ).fetchall()
+    rows = sorted(rows, key=lambda row: PHASE_ORDER.get(row["phase"], len(PHASE_ORDER)))
+    return [
+        Photo(
+            row["phase"], f"{job_id}/{row['phase']}/{row['filename']}", row["size"], row["sha256"] or row["tag"], row["taken_at"]
+        )
+        for row in rows
+    ]
+
+def set_report(db_path, job_id, digest, size):
+    now = time.time()
+    with connect(db_path) as conn:
+        conn.execute(
+            "UPDATE jobs SET report_digest = ?, report_size = ?, report_rendered_at = ?, updated_at = ? WHERE job_id = ?",
+            (digest, size, now, now, job_id),
+        )
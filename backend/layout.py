@@ -0,0 +1,48 @@
+import os
+
+# ========= Report Photo Grid =========
+# Photo pages hold a COLSxROWS grid (REPORT_GRID, e.g. 2x2 or 3x3). Each photo
+# is scaled to fit its cell, keeping its aspect ratio, with a caption
+# underneath. The cell width is also the width print-size derivatives are
+# made for. Derivative names include it, so changing the grid means they are
+# remade, not reused at the wrong size.
+REPORT_GRID = os.getenv("REPORT_GRID", "2x2")
+PAGE_WIDTH_MM = 210  # A4, fpdf's default page
+MARGIN_MM = 10  # fpdf's default side margins
+GAP_MM = 5
+CAPTION_MM = 6
+
+def parse_grid(text):
+    """"3x2" -> (3 columns, 2 rows)"""
+    cols, sep, rows = text.strip().lower().partition("x")
+    if not (sep and cols.isdigit() and rows.isdigit() and int(cols) > 0 and int(rows) > 0):
+        raise ValueError(f"REPORT_GRID must look like 2x2 or 3x3, not {text!r}")
+    return int(cols), int(rows)
+
+GRID_COLS, GRID_ROWS = parse_grid(REPORT_GRID)
+# The widest any photo is drawn, rounded down to whole millimetres
+CELL_WIDTH_MM = int((PAGE_WIDTH_MM - 2 * MARGIN_MM - GAP_MM * (GRID_COLS - 1)) / GRID_COLS)
+
+def grid_cells(top, bottom, cols=GRID_COLS, rows=GRID_ROWS):
+    """(x, y, width, height) of each cell between `top` and `bottom`, row by row.
+    A cell's height includes the caption line at its foot."""
+    width = (PAGE_WIDTH_MM - 2 * MARGIN_MM - GAP_MM * (cols - 1)) / cols
+    height = (bottom - top - GAP_MM * (rows - 1)) / rows
+    return [
+        (MARGIN_MM + col * (width + GAP_MM), top + row * (height + GAP_MM), width, height)
+        for row in range(rows)
+        for col in range(cols)
+    ]
+
+def capture_order(photo):
+    """Sort key: photos with a capture time first, oldest first, then the rest by name"""
+    return (photo.taken_at is None, photo.taken_at or "", photo.key)
+
+def caption(photo):
+    """File name, plus the capture time when the photo has one"""
+    name = photo.key.rsplit("/", 1)[-1]
+    if not photo.taken_at:
+        return name
+    # EXIF writes "2025:07:19 14:03:22"
+    date, _, clock = photo.taken_at.partition(" ")
+    return f"{name} · {date.replace(':', '-')} {clock[:5]}"
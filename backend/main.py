@@ -1,17 +1,47 @@
 import os
 import uuid
-import shutil
-import pandas as pd
-import requests
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTasks, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from fpdf import FPDF
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from typing import List
+import tasks
+import uploads
+import job_index
+import metrics
+import profiling
+from catalog import Catalog, read_catalog, compile_catalog, compile_lock, open_compiled, compiled_path_for, file_sha256
+from report import render_report, render_report_bytes, render_with_timings, input_digest, report_key, stored_photos, PHOTO_SECTIONS
+from imaging import make_all_derivatives, photo_metadata
+from storage import get_storage, iter_chunks, LOCAL_ROOT, PRESIGN_EXPIRES
+from tasks import render_task
 
 # ========= Setup =========
-app = FastAPI()
-UPLOAD_DIR = "jobs"
+@asynccontextmanager
+async def lifespan(app):
+    tasks.init_db(TASKS_DB)
+    job_index.init_db(JOBS_DB)
+    # Create the storage client now, so a bad STORAGE_BACKEND fails at startup
+    get_storage()
+    # Load the catalog in the background so the app can answer health checks at once
+    start_catalog_load()
+    yield
+    if report_pool is not None:
+        report_pool.shutdown(cancel_futures=True)
+
+app = FastAPI(lifespan=lifespan)
+# Local state: the task database, partial uploads and, with the default
+# storage backend, the jobs themselves
+UPLOAD_DIR = LOCAL_ROOT
+TASKS_DB = os.path.join(UPLOAD_DIR, "tasks.db")
+# What every job contains and whether its report is current
+JOBS_DB = os.path.join(UPLOAD_DIR, "jobs.db")
+# In-progress chunked uploads, kept out of the job folders until complete
+CHUNKED_DIR = os.path.join(UPLOAD_DIR, ".uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # Allow frontend → backend communication
@@ -24,34 +54,58 @@ app.add_middleware(
 )
 
 # ========= Load Xactimate CSV =========
-xactimate_data = {}
+xactimate_data = Catalog.from_columns([], [], [], [])
+# Identifies the loaded price list so cached reports are re-rendered when it changes
+catalog_version = ""
 csv_path = os.path.join("backend", "xactimate_ca.csv")
+# Binary build of the CSV; rebuilt automatically whenever the CSV changes
+compiled_path = compiled_path_for(csv_path)
 
 def load_csv():
+    global xactimate_data, catalog_version
     try:
-        df = pd.read_csv(csv_path, encoding="utf-8", on_bad_lines="skip")
-        if set(df.columns) >= {"Item", "Description", "Unit", "Price"}:
-            for _, row in df.iterrows():
-                try:
-                    code = str(row["Item"]).strip()
-                    desc = str(row["Description"]).strip()
-                    unit = str(row["Unit"]).strip()
-                    price = float(row["Price"])
-                    xactimate_data[code] = {"desc": desc, "unit": unit, "price": price}
-                except Exception:
-                    continue
-            print(f"✅ Loaded {len(xactimate_data)} Xactimate items from {csv_path}")
-        else:
-            print(f"⚠️ CSV header mismatch: {df.columns.tolist()}")
+        # Workers all map the same compiled file, so the catalog's memory is
+        # shared between them instead of copied into each one
+        compiled = open_compiled(compiled_path, csv_path)
+        if compiled is None:
+            with compile_lock(compiled_path):
+                # Another worker may have compiled it while we waited
+                compiled = open_compiled(compiled_path, csv_path) or compile_csv()
+        xactimate_data = compiled
+        catalog_version = compiled.version
+        print(f"✅ Loaded {len(xactimate_data)} Xactimate items from {csv_path}")
+    except ValueError as e:
+        print(f"⚠️ {e}")
     except Exception as e:
         print(f"⚠️ Error reading CSV: {e}")
 
-# If CSV missing, download from GitHub
-if not os.path.exists(csv_path):
+def compile_csv():
+    """Parse the CSV and write the compiled file, returning the mapped catalog"""
+    items, bad_lines = read_catalog(csv_path)
+    if bad_lines:
+        print(f"⚠️ Skipped {len(bad_lines)} malformed rows in {csv_path} (lines {bad_lines[:10]}{'...' if len(bad_lines) > 10 else ''})")
+    catalog = Catalog.from_frame(items, file_sha256(csv_path).hex())
+    try:
+        compile_catalog(catalog, compiled_path, csv_path)
+    except OSError as e:
+        print(f"⚠️ Could not write compiled catalog {compiled_path}: {e}")
+        return catalog
+    print(f"✅ Compiled {csv_path} into {compiled_path}")
+    return open_compiled(compiled_path, csv_path) or catalog
+
+def load_catalog():
+    """Fetch the CSV if it is missing, then load it. Runs in a thread at startup."""
+    if os.path.exists(csv_path):
+        load_csv()
+        return
+
+    # If CSV missing, download from GitHub
     print("⚠️ CSV not found locally. Attempting to download from GitHub...")
     try:
-       url = "https://raw.githubusercontent.com/bluffjeff/photo-scope-app/refs/heads/main/backend/xactimate_ca.csv"
-        r = requests.get(url)
+        import requests
+
+        url = "https://raw.githubusercontent.com/bluffjeff/photo-scope-app/refs/heads/main/backend/xactimate_ca.csv"
+        r = requests.get(url, timeout=30)
         if r.status_code == 200:
             os.makedirs("backend", exist_ok=True)
             with open(csv_path, "wb") as f:
@@ -62,149 +116,491 @@ if not os.path.exists(csv_path):
             print(f"❌ Failed to fetch CSV from GitHub (status {r.status_code})")
     except Exception as e:
         print(f"❌ Could not fetch CSV from GitHub: {e}")
-else:
-    load_csv()
-
-# ========= PDF Class with Safe Font =========
-class PDF(FPDF):
-    def __init__(self):
-        super().__init__()
-        self.set_auto_page_break(auto=True, margin=15)
-
-        self.has_dejavu = False
-        font_path = os.path.join("backend", "fonts", "DejaVuSans.ttf")
-
-        try:
-            if os.path.exists(font_path):
-                self.add_font("DejaVu", "", font_path, uni=True)
-                self.set_font("DejaVu", size=12)
-                self.has_dejavu = True
-                print("✅ Using DejaVuSans.ttf (UTF-8 support enabled)")
-            else:
-                raise FileNotFoundError
-        except Exception as e:
-            self.set_font("Arial", size=12)
-            print(f"⚠️ Font fallback: DejaVuSans not loaded ({e}), using Arial")
-
-    def safe_set_font(self, size=12, bold=False):
-        """Use DejaVu if available, otherwise Arial"""
-        if self.has_dejavu:
-            self.set_font("DejaVu", "B" if bold else "", size=size)
-        else:
-            self.set_font("Arial", "B" if bold else "", size=size)
+
+catalog_task = None
+
+def start_catalog_load():
+    """Start loading the catalog in a thread, once, and return that task"""
+    global catalog_task
+    if catalog_task is None:
+        catalog_task = asyncio.ensure_future(asyncio.to_thread(load_catalog))
+    return catalog_task
+
+def catalog_loaded():
+    """Whether the load finished with items to price. A failed load also
+    finishes, since load_catalog() logs errors rather than raising them."""
+    if catalog_task is None or not catalog_task.done() or catalog_task.cancelled():
+        return False
+    return catalog_task.exception() is None and len(xactimate_data) > 0
+
+async def get_catalog():
+    """The loaded catalog, waiting for the load to finish if needed"""
+    # Shielded so a client disconnecting mid-wait cannot cancel the shared load
+    await asyncio.shield(start_catalog_load())
+    return xactimate_data
+
+# ========= Report Worker Pool =========
+# Rendering decodes every photo and builds the whole PDF in memory, so it runs
+# in a process pool instead of on the event loop.
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", os.cpu_count() or 1))
+# Reports accepted at once (rendering + waiting for a worker) before we shed load
+REPORT_QUEUE_SIZE = int(os.getenv("REPORT_QUEUE_SIZE", 16))
+# Renders allowed to run at the same time for a single job
+REPORT_JOB_CONCURRENCY = int(os.getenv("REPORT_JOB_CONCURRENCY", 1))
+
+report_pool = None
+reports_in_flight = 0
+job_slots = {}
+background_tasks = set()
+
+def get_report_pool():
+    global report_pool
+    if report_pool is None:
+        report_pool = ProcessPoolExecutor(
+            max_workers=REPORT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return report_pool
+
+def discard_report_pool(pool):
+    """Drop a pool a dead worker has broken (an OOM kill on a huge photo, say),
+    so the next render starts a new one instead of failing like this one"""
+    global report_pool
+    if report_pool is pool:
+        report_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        print("⚠️ A report worker died; starting a new pool for later reports")
+
+def submit_to_report_pool(fn, *args, **kwargs):
+    """Submit to the report pool; returns (pool, future)"""
+    pool = get_report_pool()
+    try:
+        return pool, pool.submit(fn, *args, **kwargs)
+    except BrokenProcessPool:
+        # Broken by an earlier render, not this one, so it gets a fresh pool
+        discard_report_pool(pool)
+        pool = get_report_pool()
+        return pool, pool.submit(fn, *args, **kwargs)
+
+def reserve_report_slot():
+    """Claim a place in the report queue, or reject the request if it is full"""
+    global reports_in_flight
+    if reports_in_flight >= REPORT_QUEUE_SIZE:
+        raise HTTPException(status_code=503, detail="Report queue is full, try again shortly")
+    reports_in_flight += 1
+
+async def run_in_report_pool(job_id, mode, fn, *args, profile=None, **kwargs):
+    """Run the render function `fn` in the report pool under the per-job limit,
+    recording its phase timings under the metrics label `mode`.
+    `profile`, if given, is a (format, storage key) to profile the render to.
+
+    The caller must already hold a slot from reserve_report_slot(); it is
+    released here once the render finishes.
+    """
+    loop = asyncio.get_running_loop()
+    slot = job_slots.setdefault(job_id, {"sem": asyncio.Semaphore(REPORT_JOB_CONCURRENCY), "users": 0})
+    slot["users"] += 1
+
+    def release(job_turn):
+        global reports_in_flight
+        reports_in_flight -= 1
+        if job_turn:
+            slot["sem"].release()
+        slot["users"] -= 1
+        if not slot["users"]:
+            job_slots.pop(job_id, None)
+
+    if profile:
+        args = (*profile, fn, *args)
+        fn = profiling.profiled
+    job_turn = handed_off = False
+    try:
+        with metrics.report_render_seconds.time(mode=mode):
+            await slot["sem"].acquire()
+            job_turn = True
+            pool, future = submit_to_report_pool(render_with_timings, fn, *args, **kwargs)
+            # From here the render frees its places when it ends, not when we
+            # do: a client that disconnects cancels this coroutine, but a
+            # render already running in the pool carries on regardless
+            future.add_done_callback(lambda _: loop.call_soon_threadsafe(release, True))
+            handed_off = True
+            try:
+                result, timings = await asyncio.wrap_future(future)
+            except BrokenProcessPool:
+                discard_report_pool(pool)
+                raise
+        # Profiler overhead would skew the phase histograms
+        if not profile:
+            for phase, seconds in timings.items():
+                metrics.report_seconds.observe(seconds, phase=phase)
+        metrics.reports_rendered.inc(mode=mode)
+        return result
+    except Exception:
+        metrics.report_failures.inc(mode=mode)
+        raise
+    finally:
+        if not handed_off:
+            release(job_turn)
+
+async def process_report_task(task_id, job_id, line_items, photos, digest, profile=None):
+    try:
+        _, size = await run_in_report_pool(
+            job_id, "task", render_task, TASKS_DB, task_id, job_id, line_items, photos, profile=profile
+        )
+    except Exception as e:
+        await asyncio.to_thread(tasks.update_task, TASKS_DB, task_id, status=tasks.FAILED, error=str(e) or type(e).__name__)
+    else:
+        await asyncio.to_thread(job_index.set_report, JOBS_DB, job_id, digest, size)
+        await asyncio.to_thread(tasks.update_task, TASKS_DB, task_id, status=tasks.DONE)
+
+def pdf_response(chunks, size):
+    return StreamingResponse(
+        chunks,
+        media_type="application/pdf",
+        headers={"Content-Length": str(size), "Content-Disposition": 'attachment; filename="report.pdf"'},
+    )
+
+async def stored_report_response(job_id):
+    """The job's stored report, or None if there is none. The length comes from
+    the object being sent, not the index: a re-render replaces the report
+    before the index hears of its new size."""
+    try:
+        size, chunks = await in_storage("open_stream", report_key(job_id))
+    except FileNotFoundError:
+        return None
+    return pdf_response(chunks, size)
+
+async def stored_report_exists(job_id):
+    return await in_storage("stat", report_key(job_id)) is not None
+
+# ========= Job Storage =========
+# Storage calls may be network round trips (S3), so they run off the event loop.
+async def in_storage(method, *args):
+    return await asyncio.to_thread(getattr(get_storage(), method), *args)
+
+def index_stored_job(job_id):
+    """Add a job created before the job index to it, from what is in storage.
+    Returns its index row, or None if storage has no such job either."""
+    storage = get_storage()
+    # Every job is created with its notes
+    if storage.stat(f"{job_id}/notes.txt") is None:
+        return None
+    job_index.create_job(JOBS_DB, job_id)
+    photos = stored_photos(job_id)
+    for _, phase in PHOTO_SECTIONS:
+        job_index.record_photos(JOBS_DB, job_id, phase, [
+            (photo.key.rsplit("/", 1)[-1], photo.size, None, photo.content, None) for photo in photos if photo.phase == phase
+        ])
+    report = storage.stat(report_key(job_id))
+    if report:
+        # No digest, so the next generate-report renders it afresh
+        job_index.set_report(JOBS_DB, job_id, None, report.size)
+    return job_index.get_job(JOBS_DB, job_id)
+
+async def find_job(job_id):
+    """The job's index row, or None"""
+    job = await asyncio.to_thread(job_index.get_job, JOBS_DB, job_id)
+    if job is None:
+        job = await asyncio.to_thread(index_stored_job, job_id)
+    return job
+
+def requested_profile(job_id, query, header):
+    """(format, storage key) when the request asks for a profiled render, else None"""
+    fmt = query or header
+    if not fmt:
+        return None
+    if not profiling.PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled; set REPORT_PROFILING=1 to enable it")
+    if fmt not in profiling.PROFILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Profile must be one of {', '.join(profiling.PROFILE_FORMATS)}")
+    return fmt, profiling.profile_key(job_id, fmt)
+
+def profile_url(key):
+    job_id, _, name = key.split("/")
+    return f"/profiles/{job_id}/{name}"
+
+async def require_job(job_id):
+    job = await find_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 # ========= Endpoints =========
 
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok", "catalog_loaded": catalog_loaded()}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Upload and report counters and timings, in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.post("/upload-inspection")
 async def upload_inspection(
-    files: List[UploadFile] = File(...),
+    background_tasks: BackgroundTasks,
+    # Optional so a job can be created first and its photos sent via /uploads
+    files: List[UploadFile] = File(None),
     notes: str = Form(...),
     scope: str = Form(...),
     sketch: UploadFile = File(None)
 ):
     job_id = str(uuid.uuid4())
-    job_dir = os.path.join(UPLOAD_DIR, job_id, "inspection")
-    os.makedirs(job_dir, exist_ok=True)
-
-    # Save photos
-    for f in files:
-        with open(os.path.join(job_dir, f.filename), "wb") as out:
-            shutil.copyfileobj(f.file, out)
 
     # Save notes & scope
-    with open(os.path.join(UPLOAD_DIR, job_id, "notes.txt"), "w", encoding="utf-8") as f:
-        f.write(notes)
-    with open(os.path.join(UPLOAD_DIR, job_id, "scope.txt"), "w", encoding="utf-8") as f:
-        f.write(scope)
+    await in_storage("put", f"{job_id}/notes.txt", notes.encode("utf-8"))
+    await in_storage("put", f"{job_id}/scope.txt", scope.encode("utf-8"))
+    await asyncio.to_thread(job_index.create_job, JOBS_DB, job_id)
 
-    # Save sketch if provided
-    if sketch:
-        sketch_path = os.path.join(job_dir, sketch.filename)
-        with open(sketch_path, "wb") as out:
-            shutil.copyfileobj(sketch.file, out)
+    # Save photos and the sketch, if provided, all in parallel
+    results = await uploads.save_uploads((files or []) + ([sketch] if sketch else []), get_storage(), job_id, "inspection")
+    await asyncio.to_thread(job_index.record_photos, JOBS_DB, job_id, "inspection", uploads.indexed_photos(results))
 
-    return {"job_id": job_id, "message": "Inspection data uploaded"}
+    # Prepare report-ready copies once the response has gone out
+    background_tasks.add_task(make_all_derivatives, uploads.saved_paths(results))
+    return {"job_id": job_id, "message": "Inspection data uploaded", "files": uploads.file_report(results)}
 
 
 @app.post("/upload-work/{job_id}")
-async def upload_work(job_id: str, files: List[UploadFile] = File(...)):
-    job_dir = os.path.join(UPLOAD_DIR, job_id, "work")
-    os.makedirs(job_dir, exist_ok=True)
-
-    for f in files:
-        with open(os.path.join(job_dir, f.filename), "wb") as out:
-            shutil.copyfileobj(f.file, out)
-
-    return {"job_id": job_id, "message": "Work photos uploaded"}
+async def upload_work(job_id: str, background_tasks: BackgroundTasks, files: List[UploadFile] = File(...)):
+    await require_job(job_id)
+
+    results = await uploads.save_uploads(files, get_storage(), job_id, "work")
+    # Bumps the job's revision, so new photos always mean a new report
+    await asyncio.to_thread(job_index.record_photos, JOBS_DB, job_id, "work", uploads.indexed_photos(results))
+    background_tasks.add_task(make_all_derivatives, uploads.saved_paths(results))
+    return {"job_id": job_id, "message": "Work photos uploaded", "files": uploads.file_report(results)}
+
+
+# Resumable uploads: init, PUT chunks at the acknowledged offset, finalize.
+# A client that loses its connection asks for the offset and carries on.
+# Registered before /uploads/{job_id}/{phase}, which would otherwise match it
+@app.post("/uploads/{upload_id}/finalize")
+async def finalize_chunked_upload(upload_id: str, background_tasks: BackgroundTasks):
+    upload = uploads.load_upload(CHUNKED_DIR, upload_id)
+    # Hashes the whole file, so keep it off the loop
+    path, digest, metadata = await uploads.run_io(uploads.finish_upload, CHUNKED_DIR, upload_id, get_storage())
+    await asyncio.to_thread(
+        job_index.record_photos, JOBS_DB, upload["job_id"], upload["phase"],
+        [(upload["filename"], upload["size"], digest, None, metadata.get("taken_at"))],
+    )
+
+    if path:
+        background_tasks.add_task(make_all_derivatives, [path])
+    return {
+        "job_id": upload["job_id"], "phase": upload["phase"], "filename": upload["filename"], "message": "Upload complete",
+        **metadata,
+    }
+
+
+@app.post("/uploads/{job_id}/{phase}")
+async def start_chunked_upload(
+    job_id: str,
+    phase: str,
+    filename: str = Form(...),
+    size: int = Form(...),
+    sha256: str = Form(None)
+):
+    await require_job(job_id)
+    upload = uploads.start_upload(CHUNKED_DIR, job_id, phase, filename, size, sha256)
+    return {"upload_id": upload["upload_id"], "offset": 0, "max_chunk_bytes": uploads.MAX_CHUNK_BYTES}
+
+
+# Direct uploads: the client PUTs the photo to object storage itself, so its
+# bytes never pass through this process, then calls /complete so the job
+# index knows about it.
+@app.post("/uploads/{job_id}/{phase}/presign")
+async def presign_upload(job_id: str, phase: str, filename: str = Form(...)):
+    await require_job(job_id)
+    storage = get_storage()
+    if not storage.presigned_uploads:
+        raise HTTPException(status_code=501, detail="Direct uploads need STORAGE_BACKEND=s3; use the chunked /uploads endpoints")
+    key = uploads.photo_key(job_id, phase, filename)
+    return {"url": storage.presign_upload(key), "method": "PUT", "key": key, "expires_in": PRESIGN_EXPIRES}
+
+
+def stored_photo_metadata(key):
+    """Metadata of a photo a client put in storage itself. One that cannot be
+    read is deleted again, since the report could never draw it."""
+    storage = get_storage()
+    metadata = photo_metadata(storage.image_source(key), key.rsplit("/", 1)[-1])
+    if "error" in metadata:
+        storage.delete(key)
+    return metadata
+
+
+@app.post("/uploads/{job_id}/{phase}/complete")
+async def complete_direct_upload(job_id: str, phase: str, filename: str = Form(...)):
+    await require_job(job_id)
+    key = uploads.photo_key(job_id, phase, filename)
+    info = await in_storage("stat", key)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Photo not found in storage")
+    metadata = await asyncio.to_thread(stored_photo_metadata, key)
+    if "error" in metadata:
+        metrics.upload_files.inc(phase=phase, result="error")
+        raise HTTPException(status_code=400, detail=metadata["error"])
+    filename = key.rsplit("/", 1)[-1]
+    await asyncio.to_thread(
+        job_index.record_photos, JOBS_DB, job_id, phase, [(filename, info.size, None, info.tag, metadata.get("taken_at"))]
+    )
+    metrics.upload_files.inc(phase=phase, result="direct")
+    metrics.upload_bytes.inc(info.size, phase=phase)
+    return {"job_id": job_id, "phase": phase, "filename": filename, "message": "Upload complete", **metadata}
+
+
+@app.get("/uploads/{upload_id}")
+async def chunked_upload_status(upload_id: str):
+    upload = uploads.load_upload(CHUNKED_DIR, upload_id)
+    return {"upload_id": upload_id, "offset": upload["offset"], "size": upload["size"]}
+
+
+async def read_chunk(request):
+    """The request body, refused with 413 as soon as it outgrows a chunk
+    rather than after all of it has been buffered"""
+    length = request.headers.get("content-length", "")
+    if length.isdigit():
+        uploads.check_chunk_size(int(length))
+    chunk = bytearray()
+    async for data in request.stream():
+        chunk += data
+        uploads.check_chunk_size(len(chunk))
+    return chunk
+
+
+@app.put("/uploads/{upload_id}")
+async def append_chunked_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    upload_checksum: str = Header(...)
+):
+    chunk = await read_chunk(request)
+    offset = await uploads.run_io(uploads.append_chunk, CHUNKED_DIR, upload_id, upload_offset, chunk, upload_checksum)
+    return {"upload_id": upload_id, "offset": offset}
 
 
 @app.get("/generate-report/{job_id}")
-async def generate_report(job_id: str):
-    job_dir = os.path.join(UPLOAD_DIR, job_id)
-    insp_dir = os.path.join(job_dir, "inspection")
-    work_dir = os.path.join(job_dir, "work")
-    report_path = os.path.join(job_dir, "final_report.pdf")
+async def generate_report(
+    job_id: str,
+    stream: bool = False,
+    profile: str = None,
+    x_profile: str = Header(None)
+):
+    job = await require_job(job_id)
+    # A profiled render always renders, so it never counts as a cache lookup
+    profile = requested_profile(job_id, profile, x_profile)
+
+    catalog = await get_catalog()
+    photos = await asyncio.to_thread(job_index.get_photos, JOBS_DB, job_id)
+    digest = input_digest(job_id, job["revision"], photos, catalog_version)
+    cached = None
+    if job["report_digest"] == digest and not profile:
+        # A current report that has gone from storage is a miss, and is rendered again
+        if stream:
+            cached = await stored_report_response(job_id)
+        elif await stored_report_exists(job_id):
+            cached = {"report_url": f"/download/{job_id}", "cached": True}
+    if not profile:
+        metrics.report_cache.inc(result="hit" if cached is not None else "miss")
+    if cached is not None:
+        return cached
+
+    line_items = catalog[:5]
+    reserve_report_slot()
+    if stream:
+        # Send the PDF in this response instead of writing it for a second request
+        data = await run_in_report_pool(job_id, "stream", render_report_bytes, job_id, line_items, photos, profile=profile)
+        response = pdf_response(iter_chunks(data), len(data))
+        if profile:
+            response.headers["X-Profile-Url"] = profile_url(profile[1])
+        return response
+
+    _, size = await run_in_report_pool(job_id, "stored", render_report, job_id, line_items, photos, profile=profile)
+    await asyncio.to_thread(job_index.set_report, JOBS_DB, job_id, digest, size)
+    if profile:
+        return {"report_url": f"/download/{job_id}", "profile_url": profile_url(profile[1])}
+    return {"report_url": f"/download/{job_id}"}
 
-    if not os.path.exists(job_dir):
-        raise HTTPException(status_code=404, detail="Job not found")
 
-    pdf = PDF()
-    pdf.add_page()
-
-    # Title
-    pdf.safe_set_font(size=16, bold=True)
-    pdf.cell(0, 10, f"Inspection Report – Job {job_id}", ln=True, align="C")
-
-    # Notes
-    notes_path = os.path.join(job_dir, "notes.txt")
-    if os.path.exists(notes_path):
-        pdf.safe_set_font(size=12)
-        pdf.multi_cell(0, 10, f"Inspector Notes:\n{open(notes_path, encoding='utf-8').read()}")
-
-    # Scope
-    scope_path = os.path.join(job_dir, "scope.txt")
-    if os.path.exists(scope_path):
-        pdf.multi_cell(0, 10, f"\nScope (Team Entry):\n{open(scope_path, encoding='utf-8').read()}")
-
-    # Inspection photos
-    if os.path.exists(insp_dir):
-        pdf.add_page()
-        pdf.safe_set_font(size=14, bold=True)
-        pdf.cell(0, 10, "Before Photos", ln=True)
-        for img in os.listdir(insp_dir):
-            if img.lower().endswith((".jpg", ".jpeg", ".png")):
-                pdf.image(os.path.join(insp_dir, img), w=80)
-
-    # Work photos
-    if os.path.exists(work_dir):
-        pdf.add_page()
-        pdf.safe_set_font(size=14, bold=True)
-        pdf.cell(0, 10, "After Photos", ln=True)
-        for img in os.listdir(work_dir):
-            if img.lower().endswith((".jpg", ".jpeg", ".png")):
-                pdf.image(os.path.join(work_dir, img), w=80)
-
-    # Xactimate line items
-    if xactimate_data:
-        pdf.add_page()
-        pdf.safe_set_font(size=14, bold=True)
-        pdf.cell(0, 10, "Xactimate Line Items", ln=True)
-        pdf.safe_set_font(size=11)
-        pdf.cell(30, 10, "Code")
-        pdf.cell(100, 10, "Description")
-        pdf.cell(30, 10, "Price", ln=True)
-        for code, item in list(xactimate_data.items())[:5]:
-            pdf.cell(30, 10, code)
-            pdf.cell(100, 10, item["desc"][:40])
-            pdf.cell(30, 10, f"${item['price']:.2f}", ln=True)
-
-    pdf.output(report_path)
-    return {"report_url": f"/download/{job_id}"}
+@app.post("/generate-report/{job_id}", status_code=202)
+async def submit_report(job_id: str, profile: str = None, x_profile: str = Header(None)):
+    job = await require_job(job_id)
+    profile = requested_profile(job_id, profile, x_profile)
+
+    catalog = await get_catalog()
+    photos = await asyncio.to_thread(job_index.get_photos, JOBS_DB, job_id)
+    digest = input_digest(job_id, job["revision"], photos, catalog_version)
+    cached = job["report_digest"] == digest and not profile and await stored_report_exists(job_id)
+    if not profile:
+        metrics.report_cache.inc(result="hit" if cached else "miss")
+    if cached:
+        task_id = await asyncio.to_thread(tasks.create_task, TASKS_DB, job_id, tasks.DONE)
+        return {"task_id": task_id, "status_url": f"/report-status/{task_id}", "cached": True}
+
+    line_items = catalog[:5]
+    task_id = await asyncio.to_thread(tasks.create_task, TASKS_DB, job_id)
+    # Reserved only once the task exists, and released by process_report_task
+    try:
+        reserve_report_slot()
+    except HTTPException as e:
+        await asyncio.to_thread(tasks.update_task, TASKS_DB, task_id, status=tasks.FAILED, error=e.detail)
+        raise
+    task = asyncio.create_task(process_report_task(task_id, job_id, line_items, photos, digest, profile))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    if profile:
+        # Written when the render finishes
+        return {"task_id": task_id, "status_url": f"/report-status/{task_id}", "profile_url": profile_url(profile[1])}
+    return {"task_id": task_id, "status_url": f"/report-status/{task_id}"}
+
+
+@app.get("/report-status/{task_id}")
+async def report_status(task_id: str):
+    task = await asyncio.to_thread(tasks.get_task, TASKS_DB, task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    status = {
+        "task_id": task_id,
+        "job_id": task["job_id"],
+        "status": task["status"],
+        "photos_done": task["photos_done"],
+        "photos_total": task["photos_total"],
+    }
+    if task["status"] == tasks.DONE:
+        status["report_url"] = f"/download/{task['job_id']}"
+    elif task["status"] == tasks.FAILED:
+        status["error"] = task["error"]
+    return status
+
+
+@app.get("/profiles/{job_id}/{name}")
+async def download_profile(job_id: str, name: str):
+    if not profiling.PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled; set REPORT_PROFILING=1 to enable it")
+    await require_job(job_id)
+    if name.startswith(".") or name != os.path.basename(name):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    try:
+        size, chunks = await in_storage("open_stream", f"{job_id}/profiles/{name}")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return StreamingResponse(
+        chunks,
+        media_type="application/octet-stream",
+        headers={"Content-Length": str(size), "Content-Disposition": f'attachment; filename="{name}"'},
+    )
 
 
 @app.get("/download/{job_id}")
 async def download_report(job_id: str):
-    report_path = os.path.join(UPLOAD_DIR, job_id, "final_report.pdf")
-    if not os.path.exists(report_path):
+    job = await find_job(job_id)
+    response = None
+    if job is not None and job["report_size"] is not None:
+        response = await stored_report_response(job_id)
+    if response is None:
         return JSONResponse(status_code=404, content={"error": "Report not found"})
-    return FileResponse(report_path, media_type="application/pdf", filename="report.pdf")
\ No newline at end of file
+    return response
\ No newline at end of file
@@ -0,0 +1,123 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# ========= Metrics =========
+# A small in-process registry exported by /metrics in the Prometheus text
+# format: counters and histograms with labels, which is all we use, without
+# taking on a client library. Values live in the API process. Report workers
+# send their phase timings back with their results (see
+# report.render_with_timings), and the API records them here. With several
+# uvicorn workers, each has its own registry, and Prometheus scrapes them as
+# separate targets.
+
+# Seconds; covers both a 5 ms metadata read and a minute-long report
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_lock = threading.Lock()
+_metrics = []
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def label_text(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+def number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """A total that only goes up, e.g. bytes ingested"""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values = {}
+        _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in sorted(self.values.items()):
+            yield f"{self.name}{label_text(self.labels, key)} {number(value)}"
+
+class Histogram:
+    """Observations counted into cumulative buckets, with their sum"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> (per-bucket counts, sum)
+        self.values = {}
+        _metrics.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        with _lock:
+            counts, total = self.values.get(key) or ([0] * len(self.buckets), 0.0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self.values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Span: observe the wall time of the block, even if it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        for key, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = label_text(self.labels, key, [("le", number(bound))])
+                yield f"{self.name}_bucket{le} {cumulative}"
+            yield f"{self.name}_sum{label_text(self.labels, key)} {number(total)}"
+            yield f"{self.name}_count{label_text(self.labels, key)} {cumulative}"
+
+def render():
+    """Every registered metric in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        for metric in _metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+# ========= Application Metrics =========
+upload_bytes = Counter("photoscope_upload_bytes_total", "Bytes of uploaded files stored", ["phase"])
+upload_files = Counter(
+    "photoscope_upload_files_total", "Uploaded files by outcome: new content, duplicate, error, or direct to storage", ["phase", "result"]
+)
+upload_seconds = Histogram(
+    "photoscope_upload_phase_seconds", "Time per uploaded file in each step of saving it", ["step"]
+)
+report_seconds = Histogram(
+    "photoscope_report_phase_seconds", "Time per report in each phase of rendering it", ["phase"]
+)
+report_render_seconds = Histogram(
+    "photoscope_report_render_seconds", "Wall time of a report render, including waiting for a worker", ["mode"]
+)
+reports_rendered = Counter("photoscope_reports_rendered_total", "Reports rendered, by how they were requested", ["mode"])
+report_failures = Counter("photoscope_report_failures_total", "Report renders that raised", ["mode"])
+# Hit ratio: rate(...{result="hit"}) / rate(...) summed over results
+report_cache = Counter("photoscope_report_cache_total", "Report requests answered from the stored report or not", ["result"])
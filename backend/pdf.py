@@ -0,0 +1,104 @@
+import os
+from io import BytesIO
+from fontTools.ttLib import TTFont
+from fpdf import FPDF
+from fpdf.fonts import TTFFont
+
+try:
+    from fpdf.fonts import SubsetMap
+except ImportError:
+    SubsetMap = None
+
+FONT_PATH = os.path.join("backend", "fonts", "DejaVuSans.ttf")
+FONT_FAMILY = "DejaVu"
+
+# ========= Process-Wide Font Cache =========
+# add_font() re-reads and re-parses the TTF (cmap, widths, glyph ids) for
+# every document. Each process parses it once here instead, and every PDF gets
+# a cheap per-document copy of the result.
+_font_cache = {}
+# The TTFFont internals add_cached_font() copies or resets. requirements.txt
+# pins the fpdf2 releases they were checked against; any other release
+# without them gets a plain add_font() per document instead.
+COPIED_FONT_ATTRS = {"i", "fontkey", "ttfont", "cw", "glyph_ids", "missing_glyphs", "biggest_size_pt", "_hbfont", "subset"}
+CAN_COPY_FONTS = SubsetMap is not None and COPIED_FONT_ATTRS <= set(getattr(TTFFont, "__slots__", ()))
+
+def cached_font(path):
+    """(font file bytes, parsed TTFFont) for `path`, or None if it cannot be
+    loaded. Logs the outcome once per process rather than once per report."""
+    if path not in _font_cache:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            loader = FPDF()
+            loader.add_font(FONT_FAMILY, "", path)
+            _font_cache[path] = (data, loader.fonts[FONT_FAMILY.lower()])
+            print(f"✅ Using {os.path.basename(path)} (UTF-8 support enabled)")
+        except Exception as e:
+            _font_cache[path] = None
+            print(f"⚠️ Font fallback: {os.path.basename(path)} not loaded ({e}), using Arial")
+    return _font_cache[path]
+
+# ========= PDF Class with Safe Font =========
+class PDF(FPDF):
+    def __init__(self):
+        super().__init__()
+        self.set_auto_page_break(auto=True, margin=15)
+
+        self.has_dejavu = self.add_cached_font(FONT_PATH)
+        if self.has_dejavu:
+            self.set_font(FONT_FAMILY, size=12)
+        else:
+            self.set_font("Arial", size=12)
+
+    def add_cached_font(self, path):
+        """Register a font from the process-wide cache; returns False if unavailable.
+
+        Parsed metrics and the cmap are shared with the cached font. The
+        per-document state (used glyphs, widths) is copied, and the fontTools
+        object is reopened from the cached bytes, because fpdf2 subsets it in
+        place when the document is written.
+        """
+        cached = cached_font(path)
+        if cached is None:
+            return False
+        if not CAN_COPY_FONTS:
+            self.add_font(FONT_FAMILY, "", path)
+            return True
+        data, parsed = cached
+
+        font = TTFFont.__new__(TTFFont)
+        for name in TTFFont.__slots__:
+            if hasattr(parsed, name):
+                setattr(font, name, getattr(parsed, name))
+        font.i = len(self.fonts) + 1
+        font.ttfont = TTFont(BytesIO(data), recalcTimestamp=False, lazy=True)
+        font.cw = parsed.cw.copy()
+        font.glyph_ids = dict(parsed.glyph_ids)
+        font.missing_glyphs = []
+        font.biggest_size_pt = 0
+        font._hbfont = None
+        font.subset = SubsetMap(font)
+        self.fonts[parsed.fontkey] = font
+        return True
+
+    def used_glyphs(self):
+        """Glyph count per TrueType font that output() will embed.
+
+        fpdf2 subsets every TrueType font to the glyphs the document draws
+        (plus .notdef and a few required ones), so this, not the 750 KB font
+        file, is what a report pays for its text.
+        """
+        return {
+            key: len(font.subset.get_all_glyph_names())
+            for key, font in self.fonts.items()
+            if isinstance(font, TTFFont)
+        }
+
+    def safe_set_font(self, size=12, bold=False):
+        """Use DejaVu if available, otherwise Arial"""
+        if self.has_dejavu:
+            # Only the regular DejaVu face is bundled, so bold falls back to it
+            self.set_font(FONT_FAMILY, "", size=size)
+        else:
+            self.set_font("Arial", "B" if bold else "", size=size)
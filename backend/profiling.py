@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import uuid
+import marshal
+import cProfile
+import threading
+from collections import Counter
+from storage import get_storage
+
+# ========= Report Profiling =========
+# A slow report can be rendered again under a profiler by asking for one on
+# /generate-report (?profile=... or an X-Profile header). The profile is
+# stored with the job, under <job>/profiles/, so a pathological job can be
+# diagnosed from its own inputs without copying them anywhere. Off unless
+# REPORT_PROFILING=1: profiled renders are slower and skip the report cache.
+#
+#   pstats    - cProfile, every call counted; open with `python -m pstats`
+#               or snakeviz
+#   collapsed - stacks sampled every PROFILE_SAMPLE_INTERVAL seconds, one
+#               "a;b;c count" line per stack, for flamegraph.pl or speedscope.
+#               Low overhead, and time spent inside Pillow and zlib shows up
+#               under the Python call that started it.
+PROFILING_ENABLED = os.getenv("REPORT_PROFILING", "0") == "1"
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.002))
+# Profile format -> file extension
+PROFILE_FORMATS = {"pstats": "prof", "collapsed": "collapsed"}
+
+def profile_key(job_id, fmt):
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    return f"{job_id}/profiles/report-{stamp}-{uuid.uuid4().hex[:6]}.{PROFILE_FORMATS[fmt]}"
+
+def frame_name(code):
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}".replace(";", ":")
+
+class StackSampler:
+    """Counts the stacks of the thread that enters it, sampled from a helper thread"""
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        self.sampler = threading.Thread(target=self.run, daemon=True)
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.done.set()
+        self.sampler.join()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def profiled(fmt, key, fn, *args, **kwargs):
+    """Pool entry point: run the render function `fn` under the profiler
+    for `fmt` and store the profile as `key`. Returns fn's result."""
+    if fmt == "pstats":
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(fn, *args, **kwargs)
+        finally:
+            profiler.create_stats()
+            # The format pstats.Stats() and Profile.dump_stats() use
+            get_storage().put(key, marshal.dumps(profiler.stats))
+    sampler = StackSampler()
+    try:
+        with sampler:
+            return fn(*args, **kwargs)
+    finally:
+        get_storage().put(key, sampler.collapsed().encode("utf-8"))
@@ -0,0 +1,208 @@
+import time
+import hashlib
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+import imaging
+import layout
+from imaging import IMAGE_EXTENSIONS, report_image
+from storage import get_storage
+
+# Everything in this module runs inside the report worker pool, so it must not
+# touch FastAPI state and every entry point has to stay picklable.
+
+REPORT_NAME = "final_report.pdf"
+# Bump whenever the report layout changes so cached reports are re-rendered
+REPORT_FORMAT = 4
+PHOTO_SECTIONS = (("Before Photos", "inspection"), ("After Photos", "work"))
+
+class Photo(NamedTuple):
+    phase: str
+    key: str
+    size: int
+    # SHA-256 of the bytes, or storage's content tag where the hash is unknown
+    content: str
+    # EXIF capture time, "YYYY:MM:DD HH:MM:SS", when the photo has one
+    taken_at: Optional[str] = None
+
+def report_key(job_id):
+    return f"{job_id}/{REPORT_NAME}"
+
+def stored_photos(job_id):
+    """A job's photos as found in storage. Lists folders, so it is for
+    rebuilding the job index and for scripts, not for request paths."""
+    storage = get_storage()
+    return [
+        Photo(phase, info.key, info.size, info.tag)
+        for _, phase in PHOTO_SECTIONS
+        for info in storage.list(f"{job_id}/{phase}/")
+    ]
+
+# ========= Report Cache =========
+def input_digest(job_id, revision, photos, catalog_version):
+    """Hash everything a report is built from: the job's revision, which
+    changes with every upload, its photos, and the catalog version and
+    report settings. Pure computation; nothing is read from storage."""
+    settings = (
+        f"{REPORT_FORMAT}:{layout.GRID_COLS}x{layout.GRID_ROWS}:"
+        f"{imaging.REPORT_IMAGE_DPI}:{imaging.REPORT_JPEG_QUALITY}:{catalog_version}"
+    )
+    h = hashlib.sha256(f"{settings}:{job_id}:{revision}\n".encode())
+    for photo in photos:
+        h.update(f"{photo.key}:{photo.size}:{photo.content}:{photo.taken_at}\n".encode())
+    return h.hexdigest()
+
+# ========= Report Rendering =========
+def unique_photos(photos, phase):
+    """The distinct photos of one phase, in capture order. A photo re-uploaded
+    under another name has the same content, so it appears once."""
+    unique = {}
+    for photo in sorted(photos, key=layout.capture_order):
+        if photo.phase == phase and photo.key.lower().endswith(IMAGE_EXTENSIONS):
+            unique.setdefault(photo.content, photo)
+    return list(unique.values())
+
+def fit_text(pdf, text, width):
+    """`text`, cut short with an ellipsis if it is wider than `width` mm"""
+    if pdf.get_string_width(text) <= width:
+        return text
+    while text and pdf.get_string_width(text + "…") > width:
+        text = text[:-1]
+    return text + "…"
+
+def read_text(storage, key):
+    try:
+        return storage.get(key).decode("utf-8")
+    except FileNotFoundError:
+        return None
+
+@contextmanager
+def timed(timings, phase):
+    """Add the block's wall time to timings[phase], if timings is a dict"""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - start
+
+def build_report(job_id, line_items, photos, progress=None, timings=None):
+    """Lay out a job's report and return the unwritten PDF.
+
+    `line_items` is a list of catalog LineItems picked by the caller, so
+    workers never need their own copy of the catalog; `photos` likewise
+    comes from the job index, so nothing lists storage here.
+    `progress`, if given, is called as progress(photos_done, photos_total).
+    `timings`, if given, is a dict that gets the seconds spent in each
+    phase: "setup", "text", "images" and "table"; the render functions below
+    add "output" and "store".
+    """
+    with timed(timings, "setup"):
+        # fpdf is slow to import, so only processes that render pay for it
+        from pdf import PDF
+
+        pdf = PDF()
+        pdf.add_page()
+        storage = get_storage()
+
+    with timed(timings, "text"):
+        # Title
+        pdf.safe_set_font(size=16, bold=True)
+        pdf.cell(0, 10, f"Inspection Report – Job {job_id}", ln=True, align="C")
+
+        # Notes
+        notes = read_text(storage, f"{job_id}/notes.txt")
+        if notes is not None:
+            pdf.safe_set_font(size=12)
+            pdf.multi_cell(0, 10, f"Inspector Notes:\n{notes}", new_x="LMARGIN", new_y="NEXT")
+
+        # Scope
+        scope = read_text(storage, f"{job_id}/scope.txt")
+        if scope is not None:
+            pdf.multi_cell(0, 10, f"\nScope (Team Entry):\n{scope}", new_x="LMARGIN", new_y="NEXT")
+
+    with timed(timings, "images"):
+        add_photo_sections(pdf, storage, photos, progress)
+
+    with timed(timings, "table"):
+        add_line_items(pdf, line_items)
+
+    return pdf
+
+def add_photo_sections(pdf, storage, photos, progress=None):
+    """Each photo phase as pages of captioned photos in a grid"""
+    # Photos, counted up front so progress can be reported as a fraction
+    sections = []
+    for title, phase in PHOTO_SECTIONS:
+        section_photos = unique_photos(photos, phase)
+        if section_photos:
+            sections.append((title, section_photos))
+    total = sum(len(section_photos) for _, section_photos in sections)
+    done = 0
+    if progress:
+        progress(done, total)
+
+    # One image per content: fpdf2 stores an image once per distinct path or
+    # bytes, so a photo in both sections is embedded once and drawn twice
+    images = {}
+    for title, section_photos in sections:
+        cells = []
+        for photo in section_photos:
+            if not cells:
+                # Every page of a section has its title, so all its grids are the same size
+                pdf.add_page()
+                pdf.safe_set_font(size=14, bold=True)
+                pdf.cell(0, 10, title if photo is section_photos[0] else f"{title} (continued)", ln=True)
+                cells = layout.grid_cells(pdf.get_y(), pdf.page_break_trigger)
+            x, y, w, h = cells.pop(0)
+
+            if photo.content not in images:
+                # Local photos come as paths, remote ones are streamed in here
+                images[photo.content] = report_image(storage.image_source(photo.key))
+            pdf.image(images[photo.content], x=x, y=y, w=w, h=h - layout.CAPTION_MM, keep_aspect_ratio=True)
+
+            pdf.safe_set_font(size=8)
+            text = fit_text(pdf, layout.caption(photo), w)
+            # text() places the baseline and never breaks the page
+            pdf.text(x + (w - pdf.get_string_width(text)) / 2, y + h - layout.CAPTION_MM / 2 + 1, text)
+
+            done += 1
+            if progress:
+                progress(done, total)
+
+def add_line_items(pdf, line_items):
+    """The Xactimate line item table, on its own page"""
+    if line_items:
+        pdf.add_page()
+        pdf.safe_set_font(size=14, bold=True)
+        pdf.cell(0, 10, "Xactimate Line Items", ln=True)
+        pdf.safe_set_font(size=11)
+        pdf.cell(30, 10, "Code")
+        pdf.cell(100, 10, "Description")
+        pdf.cell(30, 10, "Price", ln=True)
+        for item in line_items:
+            pdf.cell(30, 10, item.code)
+            pdf.cell(100, 10, item.desc[:40])
+            pdf.cell(30, 10, f"${item.price:.2f}", ln=True)
+
+def output_report(pdf, timings=None):
+    with timed(timings, "output"):
+        return bytes(pdf.output())
+
+def render_report(job_id, line_items, photos, progress=None, timings=None):
+    """Build a job's report, store it and return its (key, size)"""
+    data = output_report(build_report(job_id, line_items, photos, progress, timings), timings)
+    with timed(timings, "store"):
+        get_storage().put(report_key(job_id), data)
+    return report_key(job_id), len(data)
+
+def render_report_bytes(job_id, line_items, photos, timings=None):
+    """Build a job's report in memory, for streaming without storing it"""
+    return output_report(build_report(job_id, line_items, photos, timings=timings), timings)
+
+def render_with_timings(fn, *args, **kwargs):
+    """Pool entry point wrapping one of the render functions above: returns
+    (its result, seconds per phase), so the API process can record them"""
+    timings = {}
+    return fn(*args, timings=timings, **kwargs), timings
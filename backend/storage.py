@@ -0,0 +1,299 @@
+import os
+import io
+import tempfile
+import itertools
+from typing import NamedTuple
+import blobs
+from atomic import write_atomic
+from imaging import remove_derivatives
+
+# ========= Job Storage Backends =========
+# Everything a job is made of (photos, notes, scope, the rendered report) is
+# read and written through one of these, by key: "<job>/notes.txt",
+# "<job>/inspection/IMG_01.jpg", ... Endpoints and the report code never touch
+# paths, so backends can be swapped without changing them.
+#
+# Every backend offers put/get/delete/list/stat/stream/open_stream for small
+# objects and reads, plus add_photo() for uploads, which arrive as temp files
+# already hashed, and image_source() for the report.
+#
+#   local  - files under jobs/, photos hard-linked into a content-addressed store
+#   s3     - an S3-compatible bucket (AWS, or MinIO via S3_ENDPOINT_URL)
+#
+# MemoryStorage, a dict, is for benchmarks via use_storage() only: each report
+# worker process would get its own empty one, so the server cannot use it.
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+LOCAL_ROOT = os.getenv("LOCAL_STORAGE_ROOT", "jobs")
+# fsync local writes before reporting them done: slower, but they survive a power cut
+LOCAL_FSYNC = os.getenv("LOCAL_STORAGE_FSYNC", "0") == "1"
+S3_BUCKET = os.getenv("S3_BUCKET", "photo-scope")
+S3_PREFIX = os.getenv("S3_PREFIX", "jobs/")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+PRESIGN_EXPIRES = int(os.getenv("PRESIGN_EXPIRES", 3600))
+STREAM_CHUNK_BYTES = 1024 * 1024
+
+def file_chunks(f, chunk_size=STREAM_CHUNK_BYTES):
+    """Read an open file in chunks, closing it when done"""
+    with f:
+        yield from iter(lambda: f.read(chunk_size), b"")
+
+def body_chunks(body, chunk_size=STREAM_CHUNK_BYTES):
+    try:
+        yield from body.iter_chunks(chunk_size)
+    finally:
+        body.close()
+
+def iter_chunks(data, chunk_size=STREAM_CHUNK_BYTES):
+    """Slices of `data` without copying it"""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+class ObjectInfo(NamedTuple):
+    key: str
+    size: int
+    # Identifies the stored bytes: equal tags mean equal content
+    tag: str
+
+class LocalStorage:
+    """Objects as files under `root`; photos are hard links into the blob store"""
+
+    presigned_uploads = False
+
+    def __init__(self, root, fsync=False):
+        self.root = root
+        self.fsync = fsync
+        self.blob_root = os.path.join(root, ".blobs")
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def info(self, key, st):
+        # Hard links to one blob share an inode, and so a tag
+        return ObjectInfo(key, st.st_size, f"{st.st_dev}:{st.st_ino}:{st.st_mtime_ns}")
+
+    def put(self, key, data):
+        """Write `data` under `key` atomically, so readers never see half of it"""
+        write_atomic(self.path(key), data, fsync=self.fsync)
+
+    def get(self, key):
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def stat(self, key):
+        try:
+            return self.info(key, os.stat(self.path(key)))
+        except FileNotFoundError:
+            return None
+
+    def list(self, prefix):
+        """Objects directly under the folder `prefix` ("<job>/work/")"""
+        try:
+            entries = list(os.scandir(self.path(prefix.rstrip("/"))))
+        except FileNotFoundError:
+            return []
+        return sorted(self.info(prefix + entry.name, entry.stat()) for entry in entries if entry.is_file())
+
+    def open_stream(self, key, chunk_size=STREAM_CHUNK_BYTES):
+        """(size, chunks) of the object as it is now; a concurrent put()
+        replaces the file, so an open one keeps its bytes and its size"""
+        f = open(self.path(key), "rb")
+        return os.fstat(f.fileno()).st_size, file_chunks(f, chunk_size)
+
+    def stream(self, key, chunk_size=STREAM_CHUNK_BYTES):
+        return self.open_stream(key, chunk_size)[1]
+
+    def incoming_path(self):
+        return blobs.incoming_path(self.blob_root)
+
+    def add_photo(self, tmp_path, digest, key):
+        """Store a hashed temp file under `key`, consuming it.
+        Returns (local path, whether the content was new)."""
+        if self.fsync:
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        blob, is_new = blobs.store(self.blob_root, tmp_path, digest)
+        blobs.link(blob, path)
+        # Derivatives made from whatever was at this name before are now wrong
+        remove_derivatives(path)
+        return path, is_new
+
+    def image_source(self, key):
+        """Something Pillow can open; a path here, so derivatives can be used"""
+        return self.path(key)
+
+    def presign_upload(self, key):
+        return None
+
+class S3Storage:
+    """Objects under `prefix` in an S3-compatible bucket"""
+
+    presigned_uploads = True
+
+    def __init__(self, bucket, prefix="", endpoint_url=None):
+        # Optional dependency, only needed with STORAGE_BACKEND=s3
+        import boto3
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def object_key(self, key):
+        return self.prefix + key
+
+    def is_missing(self, error):
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=data)
+
+    def get(self, key):
+        return b"".join(self.stream(key))
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+    def stat(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError as e:
+            if self.is_missing(e):
+                return None
+            raise
+        return ObjectInfo(key, head["ContentLength"], head["ETag"].strip('"'))
+
+    def list(self, prefix):
+        infos = []
+        for page in self.client.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket, Prefix=self.object_key(prefix), Delimiter="/",
+        ):
+            for obj in page.get("Contents", []):
+                infos.append(ObjectInfo(obj["Key"][len(self.prefix):], obj["Size"], obj["ETag"].strip('"')))
+        return sorted(infos)
+
+    def open_stream(self, key, chunk_size=STREAM_CHUNK_BYTES):
+        """(size, chunks) of the object version this GET returned"""
+        from botocore.exceptions import ClientError
+
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))
+        except ClientError as e:
+            if self.is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+        return obj["ContentLength"], body_chunks(obj["Body"], chunk_size)
+
+    def stream(self, key, chunk_size=STREAM_CHUNK_BYTES):
+        return self.open_stream(key, chunk_size)[1]
+
+    def incoming_path(self):
+        fd, path = tempfile.mkstemp(suffix=".tmp")
+        os.close(fd)
+        return path
+
+    def add_photo(self, tmp_path, digest, key):
+        """Upload a hashed temp file as `key`, consuming it. Returns
+        (None, True): there is no local copy and no cross-job dedup in S3."""
+        try:
+            self.client.upload_file(tmp_path, self.bucket, self.object_key(key), ExtraArgs={"Metadata": {"sha256": digest}})
+        finally:
+            os.remove(tmp_path)
+        return None, True
+
+    def image_source(self, key):
+        """Pillow needs to seek, so the photo is streamed into memory first"""
+        return io.BytesIO(self.get(key))
+
+    def presign_upload(self, key, expires=PRESIGN_EXPIRES):
+        """A URL the client can PUT the photo to directly"""
+        return self.client.generate_presigned_url(
+            "put_object", Params={"Bucket": self.bucket, "Key": self.object_key(key)}, ExpiresIn=expires,
+        )
+
+class MemoryStorage:
+    """Objects in a dict, for measuring everything but the disk"""
+
+    presigned_uploads = False
+
+    def __init__(self):
+        self.objects = {}
+        self.versions = itertools.count()
+
+    def put(self, key, data, tag=None):
+        self.objects[key] = (bytes(data), tag or f"v{next(self.versions)}")
+
+    def get(self, key):
+        try:
+            return self.objects[key][0]
+        except KeyError:
+            raise FileNotFoundError(key) from None
+
+    def delete(self, key):
+        self.objects.pop(key, None)
+
+    def stat(self, key):
+        if key not in self.objects:
+            return None
+        data, tag = self.objects[key]
+        return ObjectInfo(key, len(data), tag)
+
+    def list(self, prefix):
+        return sorted(
+            ObjectInfo(key, len(data), tag)
+            for key, (data, tag) in self.objects.items()
+            if key.startswith(prefix) and "/" not in key[len(prefix):]
+        )
+
+    def open_stream(self, key, chunk_size=STREAM_CHUNK_BYTES):
+        data = self.get(key)
+        return len(data), iter_chunks(data, chunk_size)
+
+    def stream(self, key, chunk_size=STREAM_CHUNK_BYTES):
+        return self.open_stream(key, chunk_size)[1]
+
+    def incoming_path(self):
+        fd, path = tempfile.mkstemp(suffix=".tmp")
+        os.close(fd)
+        return path
+
+    def add_photo(self, tmp_path, digest, key):
+        new = not any(tag == digest for _, tag in self.objects.values())
+        with open(tmp_path, "rb") as f:
+            self.put(key, f.read(), tag=digest)
+        os.remove(tmp_path)
+        return None, new
+
+    def image_source(self, key):
+        return io.BytesIO(self.get(key))
+
+    def presign_upload(self, key):
+        return None
+
+_storage = None
+
+def get_storage():
+    """The configured backend, created once per process (API and report workers alike)"""
+    global _storage
+    if _storage is None:
+        if STORAGE_BACKEND == "local":
+            _storage = LocalStorage(LOCAL_ROOT, fsync=LOCAL_FSYNC)
+        elif STORAGE_BACKEND == "s3":
+            _storage = S3Storage(S3_BUCKET, S3_PREFIX, S3_ENDPOINT_URL)
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}; use local or s3")
+    return _storage
+
+def use_storage(storage):
+    """Replace this process's backend; for benchmarks and scripts"""
+    global _storage
+    _storage = storage
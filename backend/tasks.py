@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import time
+import uuid
+from report import render_report
+
+# Report tasks live in SQLite so that pool workers (separate processes) can
+# publish progress and the API can answer status polls without sharing memory.
+# Each task records the API process that runs it (owner_pid). Every uvicorn
+# worker shares this database, so a worker starting up fails only the
+# unfinished tasks whose owner has died, not those its siblings are rendering.
+
+QUEUED, RENDERING, DONE, FAILED = "queued", "rendering", "done", "failed"
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def owner_alive(pid):
+    if pid is None or pid == os.getpid():
+        # Nothing has been started here yet, so a task with our pid belongs to
+        # an earlier process that had it too (a restarted container's pid 1)
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def init_db(db_path):
+    """Create the task table and fail any unfinished task whose process has died"""
+    with connect(db_path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS report_tasks (
+                task_id TEXT PRIMARY KEY,
+                job_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                photos_done INTEGER NOT NULL DEFAULT 0,
+                photos_total INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                owner_pid INTEGER,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        # Tables created before tasks had owners; their tasks count as orphaned
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(report_tasks)")}
+        if "owner_pid" not in columns:
+            conn.execute("ALTER TABLE report_tasks ADD COLUMN owner_pid INTEGER")
+        owners = conn.execute(
+            "SELECT DISTINCT owner_pid FROM report_tasks WHERE status IN (?, ?)", (QUEUED, RENDERING)
+        ).fetchall()
+        for (pid,) in owners:
+            if owner_alive(pid):
+                continue
+            conn.execute(
+                "UPDATE report_tasks SET status = ?, error = ?, updated_at = ? WHERE status IN (?, ?) AND owner_pid IS ?",
+                (FAILED, "Interrupted by server restart", time.time(), QUEUED, RENDERING, pid),
+            )
+
+def create_task(db_path, job_id, status=QUEUED):
+    """A new task for `job_id`, owned by this process"""
+    task_id = str(uuid.uuid4())
+    now = time.time()
+    with connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO report_tasks (task_id, job_id, status, owner_pid, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (task_id, job_id, status, os.getpid(), now, now),
+        )
+    return task_id
+
+def update_task(db_path, task_id, **fields):
+    fields["updated_at"] = time.time()
+    columns = ", ".join(f"{name} = ?" for name in fields)
+    with connect(db_path) as conn:
+        conn.execute(f"UPDATE report_tasks SET {columns} WHERE task_id = ?", (*fields.values(), task_id))
+
+def get_task(db_path, task_id):
+    with connect(db_path) as conn:
+        row = conn.execute("SELECT * FROM report_tasks WHERE task_id = ?", (task_id,)).fetchone()
+    return dict(row) if row else None
+
+def render_task(db_path, task_id, job_id, line_items, photos, timings=None):
+    """Pool entry point: render a job's report while publishing progress"""
+    update_task(db_path, task_id, status=RENDERING)
+
+    def progress(done, total):
+        update_task(db_path, task_id, photos_done=done, photos_total=total)
+
+    return render_report(job_id, line_items, photos, progress=progress, timings=timings)
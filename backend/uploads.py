@@ -0,0 +1,256 @@
+import os
+import json
+import uuid
+import asyncio
+import hashlib
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+import metrics
+from imaging import photo_metadata
+
+try:
+    import fcntl
+except ImportError:  # Windows: no file locks, so racing appends are not caught
+    fcntl = None
+
+# ========= Upload Writes =========
+# Copying an upload to disk blocks, so it runs on a dedicated thread pool
+# rather than on the event loop, where one large file would stall every
+# other request. It is separate from the default executor so uploads cannot
+# starve other threaded work. The pool is shared by all requests, so it also
+# bounds how many files are processed at once server-wide.
+UPLOAD_IO_THREADS = int(os.getenv("UPLOAD_IO_THREADS", 8))
+# Large copy buffer: fewer, bigger write() calls for multi-hundred-MB photos
+UPLOAD_COPY_BUFFER = int(os.getenv("UPLOAD_COPY_BUFFER", 1024 * 1024))
+
+io_pool = ThreadPoolExecutor(max_workers=UPLOAD_IO_THREADS, thread_name_prefix="upload-io")
+
+def run_io(fn, *args):
+    """Run blocking file work on the upload I/O pool"""
+    return asyncio.get_running_loop().run_in_executor(io_pool, fn, *args)
+
+def copy_and_hash(src, path):
+    """Copy `src` to `path` in one pass; returns (bytes written, SHA-256 hex)"""
+    h = hashlib.sha256()
+    size = 0
+    with open(path, "wb") as out:
+        for block in iter(lambda: src.read(UPLOAD_COPY_BUFFER), b""):
+            h.update(block)
+            out.write(block)
+            size += len(block)
+    return size, h.hexdigest()
+
+# Photo folders of a job, in report order
+PHASES = ("inspection", "work")
+
+def photo_key(job_id, phase, filename):
+    """Storage key for a job photo: <job>/<phase>/<file name>"""
+    if phase not in PHASES:
+        raise HTTPException(status_code=400, detail=f"Phase must be one of {', '.join(PHASES)}")
+    filename = os.path.basename(filename or "")
+    if not filename:
+        raise HTTPException(status_code=400, detail="Missing filename")
+    return f"{job_id}/{phase}/{filename}"
+
+def process_file(src, storage, key):
+    """Save one uploaded file and describe it. Runs on the I/O pool, and
+    reports failure in the result rather than raising, so one bad file does
+    not sink the rest of the batch. A result with an "error" was not stored."""
+    _, phase, filename = key.split("/")
+    result = {"filename": filename}
+    tmp_path = storage.incoming_path()
+    try:
+        with metrics.upload_seconds.time(step="copy"):
+            result["size"], result["sha256"] = copy_and_hash(src, tmp_path)
+        with metrics.upload_seconds.time(step="metadata"):
+            metadata = photo_metadata(tmp_path, filename)
+        if "error" in metadata:
+            # A photo the report cannot draw must not reach the job
+            raise ValueError(metadata["error"])
+        with metrics.upload_seconds.time(step="store"):
+            path, is_new = storage.add_photo(tmp_path, result["sha256"], key)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        result["error"] = f"Could not save: {e}"
+        metrics.upload_files.inc(phase=phase, result="error")
+        return result
+    metrics.upload_files.inc(phase=phase, result="new" if is_new else "duplicate")
+    metrics.upload_bytes.inc(result["size"], phase=phase)
+    result["duplicate"] = not is_new
+    result.update(metadata)
+    result["path"] = path
+    return result
+
+async def save_uploads(files, storage, job_id, phase):
+    """Save and inspect every UploadFile in parallel; one result per file, in order.
+
+    Names are checked before any file is written. A file without one gets an
+    "error" result. When a name repeats, only the last file with it is saved,
+    as if the files had been sent one after another, and the earlier ones get
+    an "error" result.
+    """
+    keys = [photo_key(job_id, phase, f.filename) if os.path.basename(f.filename or "") else None for f in files]
+    last = {key: i for i, key in enumerate(keys) if key}
+
+    async def save(i, f, key):
+        error = None
+        if key is None:
+            error = "Missing filename"
+        elif last[key] != i:
+            error = "Not saved: a later file in this upload has the same name"
+        if error:
+            metrics.upload_files.inc(phase=phase, result="error")
+            return {"filename": f.filename or "", "error": error}
+        return await run_io(process_file, f.file, storage, key)
+
+    return await asyncio.gather(*(save(i, f, key) for i, (f, key) in enumerate(zip(files, keys))))
+
+def saved_paths(results):
+    """Local paths of the saved files, for derivative generation"""
+    return [r["path"] for r in results if r.get("path")]
+
+def indexed_photos(results):
+    """(filename, size, sha256, tag, taken_at) of the saved files, for the job index"""
+    return [(r["filename"], r["size"], r["sha256"], None, r.get("taken_at")) for r in results if "error" not in r]
+
+def file_report(results):
+    """Per-file results as returned to the client, without server paths"""
+    return [{key: value for key, value in r.items() if key != "path"} for r in results]
+
+# ========= Resumable Chunked Uploads =========
+# An upload is a .part file that only ever grows by whole, checksummed
+# chunks, plus a .json file describing where it goes once complete. Both live
+# in one folder under UPLOAD_DIR so an upload id is enough to find them.
+# The size of the .part file is the last acknowledged byte, which is where
+# an interrupted client resumes.
+MAX_CHUNK_BYTES = int(os.getenv("MAX_CHUNK_BYTES", 16 * 1024 * 1024))
+
+def part_path(upload_root, upload_id):
+    return os.path.join(upload_root, f"{upload_id}.part")
+
+def meta_path(upload_root, upload_id):
+    return os.path.join(upload_root, f"{upload_id}.json")
+
+def start_upload(upload_root, job_id, phase, filename, size, sha256=None):
+    key = photo_key(job_id, phase, filename)
+    if size < 0:
+        raise HTTPException(status_code=400, detail="Size must not be negative")
+
+    os.makedirs(upload_root, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    meta = {
+        "upload_id": upload_id,
+        "job_id": job_id,
+        "phase": phase,
+        "filename": key.rsplit("/", 1)[-1],
+        "key": key,
+        "size": size,
+        "sha256": sha256.lower() if sha256 else None,
+    }
+    with open(meta_path(upload_root, upload_id), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    open(part_path(upload_root, upload_id), "wb").close()
+    return meta
+
+def load_upload(upload_root, upload_id):
+    """The upload's metadata plus its current offset; 404 if unknown"""
+    # Ids are hex, which also keeps them from naming paths outside upload_root
+    try:
+        uuid.UUID(hex=upload_id)
+        with open(meta_path(upload_root, upload_id), encoding="utf-8") as f:
+            meta = json.load(f)
+        meta["offset"] = os.path.getsize(part_path(upload_root, upload_id))
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return meta
+
+@contextmanager
+def locked_part(upload_root, upload_id):
+    """Yield (the .part file open for appending, the upload's metadata) while
+    holding an exclusive lock on the file. A retried chunk racing the original,
+    in this worker or another, must not pass the offset check twice. The lock
+    lives on the file, so it goes away with the upload."""
+    try:
+        uuid.UUID(hex=upload_id)
+        # Not created if missing: only start_upload makes uploads
+        fd = os.open(part_path(upload_root, upload_id), os.O_WRONLY | os.O_APPEND)
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    with os.fdopen(fd, "ab") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        # Read under the lock, so the offset is settled and a finished upload is gone
+        yield f, load_upload(upload_root, upload_id)
+
+def check_chunk_size(size):
+    if size > MAX_CHUNK_BYTES:
+        raise HTTPException(status_code=413, detail=f"Chunks are limited to {MAX_CHUNK_BYTES} bytes")
+
+def parse_checksum(header):
+    """`Upload-Checksum: sha256 <hex>` -> hex digest"""
+    algorithm, _, digest = (header or "").partition(" ")
+    if algorithm.lower() != "sha256" or not digest:
+        raise HTTPException(status_code=400, detail="Upload-Checksum must be 'sha256 <hex digest>'")
+    return digest.strip().lower()
+
+def append_chunk(upload_root, upload_id, offset, chunk, checksum):
+    """Append one chunk at `offset` after checking its SHA-256; returns the new offset.
+
+    A chunk for the wrong offset is rejected with 409 and the current offset,
+    so the client can resume from the last byte that was acknowledged.
+    """
+    check_chunk_size(len(chunk))
+    if hashlib.sha256(chunk).hexdigest() != parse_checksum(checksum):
+        raise HTTPException(status_code=400, detail="Chunk checksum mismatch")
+
+    with locked_part(upload_root, upload_id) as (f, meta):
+        if offset != meta["offset"]:
+            raise HTTPException(status_code=409, detail={"error": "Offset mismatch", "offset": meta["offset"]})
+        if offset + len(chunk) > meta["size"]:
+            raise HTTPException(status_code=400, detail="Chunk runs past the declared size")
+
+        f.write(chunk)
+        f.flush()
+        # Only acknowledge bytes that would survive a crash
+        os.fsync(f.fileno())
+    return offset + len(chunk)
+
+def finish_upload(upload_root, upload_id, storage):
+    """Hand a complete upload to storage; returns (local path or None, SHA-256 hex, metadata)"""
+    # Locked so a late chunk cannot land while the file is hashed and stored
+    with locked_part(upload_root, upload_id) as (_, meta):
+        if meta["offset"] != meta["size"]:
+            raise HTTPException(status_code=409, detail={"error": "Upload incomplete", "offset": meta["offset"]})
+
+        part = part_path(upload_root, upload_id)
+        h = hashlib.sha256()
+        with metrics.upload_seconds.time(step="hash"), open(part, "rb") as f:
+            for block in iter(lambda: f.read(UPLOAD_COPY_BUFFER), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        if meta["sha256"] and digest != meta["sha256"]:
+            raise HTTPException(status_code=400, detail="File checksum mismatch")
+
+        with metrics.upload_seconds.time(step="metadata"):
+            metadata = photo_metadata(part, meta["filename"])
+        if "error" in metadata:
+            # Resuming cannot fix it, so the upload goes and the client starts over
+            discard_upload(upload_root, upload_id)
+            metrics.upload_files.inc(phase=meta["phase"], result="error")
+            raise HTTPException(status_code=400, detail=metadata["error"])
+        with metrics.upload_seconds.time(step="store"):
+            path, is_new = storage.add_photo(part, digest, meta["key"])
+        metrics.upload_files.inc(phase=meta["phase"], result="new" if is_new else "duplicate")
+        metrics.upload_bytes.inc(meta["size"], phase=meta["phase"])
+        discard_upload(upload_root, upload_id)
+        return path, digest, metadata
+
+def discard_upload(upload_root, upload_id):
+    """Forget an upload, removing whatever of its files are left"""
+    for path in (part_path(upload_root, upload_id), meta_path(upload_root, upload_id)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
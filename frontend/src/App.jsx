@@ -67,12 +67,25 @@ function App() {
       return;
     }
     try {
-      const res = await fetch(`${backendUrl}/generate-report/${jobId}`);
-      const data = await res.json();
-      if (data.report_url) {
-        setReportUrl(`${backendUrl}${data.report_url}`);
-      } else {
+      const res = await fetch(`${backendUrl}/generate-report/${jobId}`, { method: "POST" });
+      const task = await res.json();
+      if (!task.status_url) {
         alert("❌ Report generation failed");
+        return;
+      }
+      // Rendering runs in the background, so poll until it finishes
+      while (true) {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        const statusRes = await fetch(`${backendUrl}${task.status_url}`);
+        const data = await statusRes.json();
+        if (data.status === "done") {
+          setReportUrl(`${backendUrl}${data.report_url}`);
+          return;
+        }
+        if (data.status === "failed") {
+          alert("❌ Report generation failed: " + data.error);
+          return;
+        }
       }
     } catch (err) {
       console.error(err);